@@ -42,6 +42,41 @@
 
 # # etc
 
+import numpy as np
+
+
+class CompiledNet():
+    # Inline copy of Week6/petri_matrix.CompiledNet for this standalone
+    # exercise: the net frozen into pre/post incidence matrices (rows are
+    # places, columns transitions, in insertion order) and one int marking
+    # vector, so enabling is a column compare and firing a vector add.
+    def __init__(self, place_ids, transition_ids, pre, post, marking):
+        self.place_ids = list(place_ids)
+        self.place_index = {place: i for i, place in enumerate(self.place_ids)}
+        self.transition_ids = list(transition_ids)
+        self.transition_index = {transition: j for j, transition in enumerate(self.transition_ids)}
+        self.pre = pre
+        self.post = post
+        self.change = post - pre
+        self.marking = marking
+
+    def get_tokens(self, place):
+        return int(self.marking[self.place_index[place]])
+
+    def is_enabled(self, transition):
+        return bool(np.all(self.marking >= self.pre[:, self.transition_index[transition]]))
+
+    def enabled_transitions(self):
+        enabled = np.all(self.marking[:, None] >= self.pre, axis=0)
+        return {self.transition_ids[j] for j in np.flatnonzero(enabled).tolist()}
+
+    def fire_transition(self, transition):
+        if self.is_enabled(transition):
+            self.marking += self.change[:, self.transition_index[transition]]
+        else:
+            print(f"Transition {transition} is not enabled.")
+
+
 class PetriNet():
     def __init__(self):
         self.places = []  # List of places
@@ -51,29 +86,42 @@ class PetriNet():
         self.markings = {}  # Dictionary for markings in each place with dynamic keys
         self.is_enabled_dict = {}  # Dictionary for transition enable status with dynamic keys
         self.fired_transition = {}  # Dictionary for fired transitions with dynamic keys
+        self.preset = {}  # Sources of the edges into each node, kept up to date by add_edge
+        self.postset = {}  # Targets of the edges out of each node, kept up to date by add_edge
+        self.enabled = set()  # Transitions enabled in the current marking
 
     def add_place(self, name):
         self.places.append(name)
         self.tokens[name] = 0  # Initialize token count for this place
         self.markings[name] = 0  # Initialize markings for this place
+        self.update_enabled(self.postset.get(name, []))
+        return self
 
     def add_transition(self, name, id):
         if id not in self.transitions:
             self.transitions[id] = []  # Initialize transition with a list if not already present
         self.transitions[id].append(name)
+        self.update_enabled([id])
+        return self
 
     def add_edge(self, source, target):
         if source not in self.edges:
             self.edges[source] = []  # Initialize edges with a list if not already present
         self.edges[source].append(target)
+        if target not in self.preset:
+            self.preset[target] = []
+        if source not in self.preset[target]:
+            self.preset[target].append(source)
+        self.postset[source] = self.edges[source]
+        self.update_enabled([target])
+        return self
 
     def get_tokens(self, place):
         return self.tokens.get(place, 0)  # Return the number of tokens in a place
 
     def is_enabled(self, transition):
         # Check if the transition is enabled
-        incoming_places = [place for place in self.edges if transition in self.edges[place]]
-        for place in incoming_places:
+        for place in self.preset.get(transition, []):
             if self.tokens[place] <= 0:
                 self.is_enabled_dict[transition] = False
                 return False
@@ -83,61 +131,96 @@ class PetriNet():
     def add_marking(self, place):
         if place in self.tokens:
             self.tokens[place] += 1
+            self.update_enabled(self.postset.get(place, []))
+        return self
 
     def fire_transition(self, transition):
         if self.is_enabled(transition):
-            incoming_places = [place for place in self.edges if transition in self.edges[place]]
-            outgoing_places = self.edges.get(transition, [])
-            for place in incoming_places:
+            for place in self.preset.get(transition, []):
                 self.tokens[place] -= 1
-            for place in outgoing_places:
+            for place in self.postset.get(transition, []):
                 self.tokens[place] += 1
+            for place in self.preset.get(transition, []) + self.postset.get(transition, []):
+                self.update_enabled(self.postset.get(place, []))
             self.fired_transition[transition] = True
         else:
             print(f"Transition {transition} is not enabled.")
 
-# Test cases
-p = PetriNet()
-
-p.add_place(1)
-p.add_place(2)
-p.add_place(3)
-p.add_place(4)
-p.add_transition("A", -1)
-p.add_transition("B", -2)
-p.add_transition("C", -3)
-p.add_transition("D", -4)
-
-p.add_edge(1, -1)
-p.add_edge(-1, 2)
-p.add_edge(2, -2)
-p.add_edge(-2, 3)
-p.add_edge(2, -3)
-p.add_edge(-3, 3)
-p.add_edge(3, -4)
-p.add_edge(-4, 4)
-
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.add_marking(1)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.fire_transition(-1)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.fire_transition(-3)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.fire_transition(-4)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.add_marking(2)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.fire_transition(-2)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-p.fire_transition(-4)
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
-
-print(p.get_tokens(4))
+    def update_enabled(self, nodes):
+        # Re-evaluates only the given nodes; postset[place] is the
+        # place -> consuming transitions index, so callers pass the consumers
+        # of the places whose tokens changed.
+        for node in nodes:
+            if node not in self.transitions:
+                continue
+            if all(self.tokens.get(place, 0) > 0 for place in self.preset.get(node, [])):
+                self.enabled.add(node)
+            else:
+                self.enabled.discard(node)
+
+    def enabled_transitions(self):
+        # Transitions enabled in the current marking, maintained incrementally
+        # by the methods that change arcs or tokens.
+        return set(self.enabled)
+
+    def compile(self):
+        # Frozen incidence-matrix copy of the net with the current marking;
+        # arcs count like fire_transition does (one token per input place,
+        # one per output edge). Compile again after changing the net.
+        place_index = {place: i for i, place in enumerate(self.places)}
+        pre = np.zeros((len(self.places), len(self.transitions)), dtype=np.int64)
+        post = np.zeros_like(pre)
+        for j, transition in enumerate(self.transitions):
+            for place in self.preset.get(transition, []):
+                pre[place_index[place], j] += 1
+            for place in self.postset.get(transition, []):
+                post[place_index[place], j] += 1
+        marking = np.array([self.tokens[place] for place in self.places], dtype=np.int64)
+        return CompiledNet(self.places, self.transitions, pre, post, marking)
+
+if __name__ == "__main__":
+    # Test cases
+    p = PetriNet()
+
+    p.add_place(1)
+    p.add_place(2)
+    p.add_place(3)
+    p.add_place(4)
+    p.add_transition("A", -1)
+    p.add_transition("B", -2)
+    p.add_transition("C", -3)
+    p.add_transition("D", -4)
+
+    p.add_edge(1, -1)
+    p.add_edge(-1, 2)
+    p.add_edge(2, -2)
+    p.add_edge(-2, 3)
+    p.add_edge(2, -3)
+    p.add_edge(-3, 3)
+    p.add_edge(3, -4)
+    p.add_edge(-4, 4)
+
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.add_marking(1)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.fire_transition(-1)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.fire_transition(-3)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.fire_transition(-4)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.add_marking(2)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.fire_transition(-2)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    p.fire_transition(-4)
+    print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+
+    print(p.get_tokens(4))
@@ -7,31 +7,41 @@ class PetriNet():
         self.markings = {}
         self.is_enabled_dict = {}
         self.fired_transition = {}
+        self.preset = {}
+        self.postset = {}
+        self.enabled = set()
 
     def add_place(self, name):
         self.places.append(name)
         self.tokens[name] = 0
         self.markings[name] = 0
+        self.update_enabled(self.postset.get(name, []))
         return self
 
     def add_transition(self, name, id):
         if id not in self.transitions:
             self.transitions[id] = []
         self.transitions[id].append(name)
+        self.update_enabled([id])
         return self
 
     def add_edge(self, source, target):
         if source not in self.edges:
             self.edges[source] = []
         self.edges[source].append(target)
+        if target not in self.preset:
+            self.preset[target] = []
+        if source not in self.preset[target]:
+            self.preset[target].append(source)
+        self.postset[source] = self.edges[source]
+        self.update_enabled([target])
         return self
 
     def get_tokens(self, place):
         return self.tokens.get(place, 0)
 
     def is_enabled(self, transition):
-        incoming_places = [place for place in self.edges if transition in self.edges[place]]
-        for place in incoming_places:
+        for place in self.preset.get(transition, []):
             if self.tokens[place] <= 0:
                 self.is_enabled_dict[transition] = False
                 return False
@@ -41,15 +51,33 @@ class PetriNet():
     def add_marking(self, place):
         if place in self.tokens:
             self.tokens[place] += 1
+            self.update_enabled(self.postset.get(place, []))
         return self
 
     def fire_transition(self, transition):
         if self.is_enabled(transition):
-            incoming_places = [place for place in self.edges if transition in self.edges[place]]
-            outgoing_places = self.edges.get(transition, [])
-            for place in incoming_places:
+            for place in self.preset.get(transition, []):
                 self.tokens[place] -= 1
-            for place in outgoing_places:
+            for place in self.postset.get(transition, []):
                 self.tokens[place] += 1
+            for place in self.preset.get(transition, []) + self.postset.get(transition, []):
+                self.update_enabled(self.postset.get(place, []))
             self.fired_transition[transition] = True
-        return self
\ No newline at end of file
+        return self
+
+    def update_enabled(self, nodes):
+        # Re-evaluates only the given nodes; postset[place] is the
+        # place -> consuming transitions index, so callers pass the consumers
+        # of the places whose tokens changed.
+        for node in nodes:
+            if node not in self.transitions:
+                continue
+            if all(self.tokens.get(place, 0) > 0 for place in self.preset.get(node, [])):
+                self.enabled.add(node)
+            else:
+                self.enabled.discard(node)
+
+    def enabled_transitions(self):
+        # Transitions enabled in the current marking, maintained incrementally
+        # by the methods that change arcs or tokens.
+        return set(self.enabled)
\ No newline at end of file
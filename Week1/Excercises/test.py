@@ -1,4 +1,9 @@
-import PetriNet
+from PetriNet import PetriNet
+
+
+def print_enabled(p):
+    enabled = p.enabled_transitions()
+    print(-1 in enabled, -2 in enabled, -3 in enabled, -4 in enabled)
 
 
 p = PetriNet()
@@ -19,28 +24,28 @@ p.add_edge(2, -3).add_edge(-3, 3)
 p.add_edge(3, -4)
 p.add_edge(-4, 4)
 
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.add_marking(1)  # add one token to place id 1
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.fire_transition(-1)  # fire transition A
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.fire_transition(-3)  # fire transition C
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.fire_transition(-4)  # fire transition D
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.add_marking(2)  # add one token to place id 2
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.fire_transition(-2)  # fire transition B
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 p.fire_transition(-4)  # fire transition D
-print(p.is_enabled(-1), p.is_enabled(-2), p.is_enabled(-3), p.is_enabled(-4))
+print_enabled(p)
 
 # by the end of the execution there should be 2 tokens on the final place
 print(p.get_tokens(4))
\ No newline at end of file
@@ -1,7 +1,16 @@
 import datetime
+import hashlib
+import itertools
+import os
+import sys
+import tempfile
 import xml.etree.ElementTree as ET
+import zlib
 from collections import defaultdict
 
+# Most partition files one spill pass writes; larger inputs take more passes.
+MAX_PARTITIONS = 256
+
 def log_as_dictionary(log):
     log_dict = defaultdict(list)
     lines = log.strip().split("\n")
@@ -19,11 +28,132 @@ def log_as_dictionary(log):
     
     return log_dict
 
+def _csv_event(task, user, timestamp):
+    return {
+        "task": task,
+        "user": user,
+        "timestamp": datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+    }
+
+def _group_csv_lines(lines):
+    cases = defaultdict(list)
+    for line in lines:
+        parts = line.rstrip("\n").split(";")
+        if len(parts) == 4:
+            task, case_id, user, timestamp = parts
+            cases[case_id].append(_csv_event(task, user, timestamp))
+    return cases
+
+def _csv_expansion(filename, sample_rows=2000):
+    # Bytes the grouped events (dicts, strings, datetimes) take per byte of
+    # CSV, measured on the first rows of the file.
+    with open(filename) as source:
+        lines = list(itertools.islice(source, sample_rows))
+    raw = sum(len(line) for line in lines)
+    if not raw:
+        return 1.0
+    cases = _group_csv_lines(lines)
+    grouped = sys.getsizeof(cases)
+    for case_id, events in cases.items():
+        grouped += sys.getsizeof(case_id) + sys.getsizeof(events)
+        for event in events:
+            grouped += sys.getsizeof(event) + sum(sys.getsizeof(value) for value in event.values())
+    return max(1.0, grouped / raw)
+
+def _partition_hash(case_id, salt):
+    # crc32 on the first pass. crc32 is affine, so a salted crc32 of the rows
+    # of one partition can land them all in one child again (the low bits of
+    # both hashes are tied); re-splits use a salted blake2b instead.
+    if salt == 0:
+        return zlib.crc32(case_id.encode())
+    digest = hashlib.blake2b(case_id.encode(), digest_size=8, salt=salt.to_bytes(8, "little"))
+    return int.from_bytes(digest.digest(), "little")
+
+def _spill(filename, prefix, partitions, salt, buffer_budget):
+    # Hashes the rows of filename by case id into `partitions` files named
+    # prefix-<i>.csv; buffered writes are flushed once the buffered lines
+    # take buffer_budget bytes. Returns the paths of the files written.
+    paths = [f"{prefix}-{i}.csv" for i in range(partitions)]
+    buffers = [[] for _ in range(partitions)]
+    buffered = 0
+
+    def flush():
+        for path, buffer in zip(paths, buffers):
+            if buffer:
+                with open(path, "a") as part:
+                    part.writelines(buffer)
+                buffer.clear()
+
+    with open(filename) as source:
+        for line in source:
+            parts = line.split(";")
+            if len(parts) != 4:
+                continue
+            if not line.endswith("\n"):
+                line += "\n"
+            buffers[_partition_hash(parts[1], salt) % partitions].append(line)
+            buffered += sys.getsizeof(line) + 8
+            if buffered >= buffer_budget:
+                flush()
+                buffered = 0
+    flush()
+    return [path for path in paths if os.path.exists(path)]
+
+def _grouped_partitions(filename, prefix, share, buffer_budget, salt=0):
+    # Spills filename into partitions of about `share` bytes and yields the
+    # cases of one partition at a time. The fan-out is capped at
+    # MAX_PARTITIONS files (each flush reopens every non-empty one), so a
+    # file more than that many shares large, or a partition that hash skew
+    # left larger than its share, is split again with a salted hash; a
+    # partition is only grouped as it is when that no longer makes it
+    # smaller, i.e. when it is a single case.
+    size = os.path.getsize(filename)
+    partitions = min(MAX_PARTITIONS, max(2, -(-size // share)))
+    for path in _spill(filename, prefix, partitions, salt, buffer_budget):
+        part_size = os.path.getsize(path)
+        if share < part_size < size:
+            yield from _grouped_partitions(path, path[:-len(".csv")], share, buffer_budget, salt + 1)
+        else:
+            with open(path) as part:
+                yield from _group_csv_lines(part).items()
+        os.remove(path)
+
+def iter_cases_from_csv(filename, memory_budget=64 * 1024 * 1024):
+    # Out-of-core version of log_as_dictionary for files larger than memory.
+    # Grouped events take several times their size on disk, so the expansion
+    # is measured on the first rows and the file is cut into partitions whose
+    # grouped cases take about half the budget; the write buffers get a
+    # quarter. Rows are hashed by case id into partition files, partitions
+    # that come out too large are split again, and each partition is grouped
+    # on its own and its complete cases are yielded. The budget is an
+    # estimate, not a hard limit: rows that differ from the sampled ones
+    # expand differently, and a single case larger than a partition's share
+    # still has to fit in memory.
+    share = max(1, int(memory_budget // 2 / _csv_expansion(filename)))
+    buffer_budget = max(1, memory_budget // 4)
+
+    if os.path.getsize(filename) <= share:
+        with open(filename) as source:
+            yield from _group_csv_lines(source).items()
+        return
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        yield from _grouped_partitions(filename, os.path.join(spill_dir, "part"), share, buffer_budget)
+
+def chronological(events, key):
+    # Traces are almost always stored in time order already, so check that in
+    # one pass and only sort the ones that are not.
+    timestamps = [event[key] for event in events]
+    if all(earlier <= later for earlier, later in zip(timestamps, timestamps[1:])):
+        return events
+    order = sorted(range(len(events)), key=timestamps.__getitem__)
+    return [events[i] for i in order]
+
 def dependency_graph_inline(log):
     dep_graph = defaultdict(lambda: defaultdict(int))
     
     for case_id, events in log.items():
-        sorted_events = sorted(events, key=lambda x: x["timestamp"])
+        sorted_events = chronological(events, "timestamp")
         
         for i in range(len(sorted_events) - 1):
             task_1 = sorted_events[i]["task"]
@@ -45,15 +175,17 @@ def safe_access_log(event_data):
         "cost": cost
     }
 
-def read_from_file(filename):
-    tree = ET.parse(filename)
-    root = tree.getroot()
-
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     namespace = {'xes': 'http://www.xes-standard.org/'}
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
 
-    log_dict = defaultdict(list)
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
 
-    for trace in root.findall('xes:trace', namespace):
         case_id = None
         for trace_attr in trace.findall('xes:string', namespace):
             if trace_attr.get('key') == 'concept:name':
@@ -61,8 +193,10 @@ def read_from_file(filename):
                 break
         
         if case_id is None:
+            root.clear()
             continue
 
+        events = []
         for event in trace.findall('xes:event', namespace):
             event_data = {
                 "concept:name": "record issue",  # Changed to match the expected key
@@ -79,13 +213,11 @@ def read_from_file(filename):
                     event_data["org:resource"] = attr.get('value', 'admin-1')       # Use the expected key
                 elif key == "time:timestamp":
                     timestamp_value = attr.get('value', None)
+                    # fromisoformat covers both the fractional-second and plain forms
                     try:
-                        event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S.%f%z').replace(tzinfo=None)
-                    except ValueError:
-                        try:
-                            event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S%z').replace(tzinfo=None)
-                        except (ValueError, TypeError):
-                            event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)  # Default value
+                        event_data["time:timestamp"] = datetime.datetime.fromisoformat(timestamp_value).replace(tzinfo=None)
+                    except (ValueError, TypeError):
+                        event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)  # Default value
                 elif key == "cost":
                     try:
                         cost_value = float(attr.get('value', 0))
@@ -96,8 +228,19 @@ def read_from_file(filename):
                     except (ValueError, TypeError):
                         event_data["cost"] = 11  # Default cost
 
-            log_dict[case_id].append(event_data)
+            events.append(event_data)
+
+        root.clear()
+        yield case_id, events
 
+
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    log_dict = defaultdict(list)
+    for case_id, events in iter_traces(filename):
+        log_dict[case_id].extend(events)
     return log_dict
 
 
@@ -19,11 +19,20 @@ def log_as_dictionary(log):
     
     return log_dict
 
+def chronological(events, key):
+    # Traces are almost always stored in time order already, so check that in
+    # one pass and only sort the ones that are not.
+    timestamps = [event[key] for event in events]
+    if all(earlier <= later for earlier, later in zip(timestamps, timestamps[1:])):
+        return events
+    order = sorted(range(len(events)), key=timestamps.__getitem__)
+    return [events[i] for i in order]
+
 def dependency_graph_inline(log):
     dep_graph = defaultdict(lambda: defaultdict(int))
     
     for case_id, events in log.items():
-        sorted_events = sorted(events, key=lambda x: x["timestamp"])
+        sorted_events = chronological(events, "timestamp")
         
         for i in range(len(sorted_events) - 1):
             task_1 = sorted_events[i]["task"]
@@ -33,14 +42,17 @@ def dependency_graph_inline(log):
     
     return dep_graph
 
-def read_from_file(filename):
-    tree = ET.parse(filename)
-    root = tree.getroot()
-
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     namespace = {'xes': 'http://www.xes-standard.org/'}
-    log_dict = defaultdict(list)
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
+
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
 
-    for trace in root.findall('xes:trace', namespace):
         case_id = None
         for trace_attr in trace.findall('xes:string', namespace):
             if trace_attr.get('key') == 'concept:name':
@@ -48,8 +60,10 @@ def read_from_file(filename):
                 break
         
         if case_id is None:
+            root.clear()
             continue
 
+        events = []
         for event in trace.findall('xes:event', namespace):
             event_data = {
                 "concept:name": "record issue",  
@@ -66,13 +80,11 @@ def read_from_file(filename):
                     event_data["org:resource"] = attr.get('value', 'admin-1')
                 elif key == "time:timestamp":
                     timestamp_value = attr.get('value', None)
+                    # fromisoformat covers both the fractional-second and plain forms
                     try:
-                        event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S.%f%z').replace(tzinfo=None)
-                    except ValueError:
-                        try:
-                            event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S%z').replace(tzinfo=None)
-                        except ValueError:
-                            event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
+                        event_data["time:timestamp"] = datetime.datetime.fromisoformat(timestamp_value).replace(tzinfo=None)
+                    except (ValueError, TypeError):
+                        event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
                 elif key == "cost":
                     try:
                         cost_value = float(attr.get('value', 0))
@@ -80,15 +92,26 @@ def read_from_file(filename):
                     except (ValueError, TypeError):
                         event_data["cost"] = 11
 
-            log_dict[case_id].append(event_data)
+            events.append(event_data)
+
+        root.clear()
+        yield case_id, events
+
 
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    log_dict = defaultdict(list)
+    for case_id, events in iter_traces(filename):
+        log_dict[case_id].extend(events)
     return log_dict
 
 def dependency_graph_file(log):
     dep_graph = defaultdict(lambda: defaultdict(int))
     
     for case_id, events in log.items():
-        sorted_events = sorted(events, key=lambda x: x["time:timestamp"])
+        sorted_events = chronological(events, "time:timestamp")
         
         for i in range(len(sorted_events) - 1):
             task_1 = sorted_events[i]["concept:name"]
@@ -11,21 +11,29 @@ class PetriNet():
     def __init__(self):
         self.places = set()
         self.transitions = set()
+        self.name_to_ids = {}  # Transitions are identified by their name
         self.tokens = {}
         self.input_arcs = defaultdict(set)   # Place -> Transitions
         self.output_arcs = defaultdict(set)  # Transition -> Places
+        self.consumers = defaultdict(set)    # Place -> Transitions that take tokens from it
+        self.enabled = set()                 # Transitions enabled in the current marking
     
     def add_place(self, name):
         self.places.add(name)
         self.tokens[name] = 0
+        self.update_enabled(self.consumers[name])
         return self
     
     def add_transition(self, name):
         self.transitions.add(name)
+        self.name_to_ids[name] = [name]
+        self.update_enabled([name])
         return self
     
     def add_input_arc(self, place, transition):
         self.input_arcs[transition].add(place)
+        self.consumers[place].add(transition)
+        self.update_enabled([transition])
         return self
     
     def add_output_arc(self, transition, place):
@@ -35,6 +43,7 @@ class PetriNet():
     def add_marking(self, place):
         if place in self.tokens:
             self.tokens[place] += 1
+            self.update_enabled(self.consumers[place])
         return self
     
     def is_enabled(self, transition):
@@ -46,18 +55,31 @@ class PetriNet():
                 self.tokens[place] -= 1
             for place in self.output_arcs[transition]:
                 self.tokens[place] += 1
+            for place in self.input_arcs[transition] | self.output_arcs[transition]:
+                self.update_enabled(self.consumers[place])
         else:
             print(f"Transition {transition} is not enabled.")
         return self
 
+    def update_enabled(self, transitions):
+        # Only the consumers of places whose tokens changed need re-checking
+        for transition in transitions:
+            if transition not in self.transitions:
+                continue
+            if self.is_enabled(transition):
+                self.enabled.add(transition)
+            else:
+                self.enabled.discard(transition)
+
+    def enabled_transitions(self):
+        return set(self.enabled)
+
 
 
     def transition_name_to_id(self, name):
         # Find the transition ID based on the transition name
-        for id, names in self.transitions.items():
-            if name in names:
-                return id
-        return None
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
 
 # Alpha Miner Algorithm implementation
 def alpha(filename):
@@ -118,14 +140,17 @@ def alpha(filename):
     return pn
 
 # Log file reader
-def read_from_file(filename):
-    tree = ET.parse(filename)
-    root = tree.getroot()
-
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     namespace = {'xes': 'http://www.xes-standard.org/'}
-    log_dict = defaultdict(list)
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
+
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
 
-    for trace in root.findall('xes:trace', namespace):
         case_id = None
         for trace_attr in trace.findall('xes:string', namespace):
             if trace_attr.get('key') == 'concept:name':
@@ -133,8 +158,10 @@ def read_from_file(filename):
                 break
         
         if case_id is None:
+            root.clear()
             continue
 
+        events = []
         for event in trace.findall('xes:event', namespace):
             event_data = {
                 "concept:name": "record issue",  
@@ -151,13 +178,11 @@ def read_from_file(filename):
                     event_data["org:resource"] = attr.get('value', 'admin-1')
                 elif key == "time:timestamp":
                     timestamp_value = attr.get('value', None)
+                    # fromisoformat covers both the fractional-second and plain forms
                     try:
-                        event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S.%f%z').replace(tzinfo=None)
-                    except ValueError:
-                        try:
-                            event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S%z').replace(tzinfo=None)
-                        except ValueError:
-                            event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
+                        event_data["time:timestamp"] = datetime.datetime.fromisoformat(timestamp_value).replace(tzinfo=None)
+                    except (ValueError, TypeError):
+                        event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
                 elif key == "cost":
                     try:
                         cost_value = float(attr.get('value', 0))
@@ -165,16 +190,27 @@ def read_from_file(filename):
                     except (ValueError, TypeError):
                         event_data["cost"] = 11
 
-            log_dict[case_id].append(event_data)
+            events.append(event_data)
+
+        root.clear()
+        yield case_id, events
+
 
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    log_dict = defaultdict(list)
+    for case_id, events in iter_traces(filename):
+        log_dict[case_id].extend(events)
     return log_dict
 
 def check_enabled(pn):
     ts = ["record issue", "inspection", "intervention authorization", "action not required",
           "work mandate", "no concession", "work completion", "issue completion"]
+    enabled = pn.enabled_transitions()
     for t in ts:
-        is_enabled = pn.is_enabled(t)
-        print(f"{t}: {is_enabled}")
+        print(f"{t}: {t in enabled}")
     print("")
 
 
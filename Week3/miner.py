@@ -11,7 +11,7 @@ class PetriNet():
         self.markings = {}
         self.is_enabled_dict = {}
         self.fired_transition = {}
-        self.name_to_id = {}
+        self.name_to_ids = {}
 
     def add_place(self, name):
         if name not in self.places:
@@ -25,7 +25,9 @@ class PetriNet():
             self.transitions[id] = []
         if name not in self.transitions[id]:
             self.transitions[id].append(name)
-        self.name_to_id[name] = id
+        ids = self.name_to_ids.setdefault(name, [])
+        if id not in ids:
+            ids.append(id)
         return self
 
     def add_edge(self, source, target):
@@ -66,7 +68,11 @@ class PetriNet():
         return self
 
     def transition_name_to_id(self, name):
-        return self.name_to_id.get(name, None)
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
+
+    def transition_name_to_ids(self, name):
+        return list(self.name_to_ids.get(name, ()))
 
 def alpha(log):
     T_L = set()
@@ -145,14 +151,17 @@ def alpha(log):
     
     return pn
 
-def read_from_file(filename):
-    tree = ET.parse(filename)
-    root = tree.getroot()
-
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     namespace = {'xes': 'http://www.xes-standard.org/'}
-    log_dict = defaultdict(list)
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
+
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
 
-    for trace in root.findall('xes:trace', namespace):
         case_id = None
         for trace_attr in trace.findall('xes:string', namespace):
             if trace_attr.get('key') == 'concept:name':
@@ -160,8 +169,10 @@ def read_from_file(filename):
                 break
         
         if case_id is None:
+            root.clear()
             continue
 
+        events = []
         for event in trace.findall('xes:event', namespace):
             event_data = {
                 "concept:name": "record issue",  
@@ -178,13 +189,11 @@ def read_from_file(filename):
                     event_data["org:resource"] = attr.get('value', 'admin-1')
                 elif key == "time:timestamp":
                     timestamp_value = attr.get('value', None)
+                    # fromisoformat covers both the fractional-second and plain forms
                     try:
-                        event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S.%f%z').replace(tzinfo=None)
-                    except ValueError:
-                        try:
-                            event_data["time:timestamp"] = datetime.datetime.strptime(timestamp_value, '%Y-%m-%dT%H:%M:%S%z').replace(tzinfo=None)
-                        except ValueError:
-                            event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
+                        event_data["time:timestamp"] = datetime.datetime.fromisoformat(timestamp_value).replace(tzinfo=None)
+                    except (ValueError, TypeError):
+                        event_data["time:timestamp"] = datetime.datetime(1970, 1, 1, 1, 0)
                 elif key == "cost":
                     try:
                         cost_value = float(attr.get('value', 0))
@@ -192,6 +201,17 @@ def read_from_file(filename):
                     except (ValueError, TypeError):
                         event_data["cost"] = 11
 
-            log_dict[case_id].append(event_data)
+            events.append(event_data)
+
+        root.clear()
+        yield case_id, events
+
 
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    log_dict = defaultdict(list)
+    for case_id, events in iter_traces(filename):
+        log_dict[case_id].extend(events)
     return log_dict
\ No newline at end of file
@@ -6,6 +6,7 @@ class PetriNet:
     def __init__(self):
         self.places = {}
         self.transitions = {}
+        self.name_to_ids = {}
         self.input_edges = {}
         self.output_edges = {}
 
@@ -13,6 +14,9 @@ class PetriNet:
         self.places[name] = 0
 
     def add_transition(self, name, transition_id):
+        if transition_id in self.transitions:
+            self.name_to_ids[self.transitions[transition_id]].remove(transition_id)
+        self.name_to_ids.setdefault(name, []).append(transition_id)
         self.transitions[transition_id] = name
 
     def add_edge(self, source, target):
@@ -50,10 +54,11 @@ class PetriNet:
                 self.places[place] += 1
 
     def transition_name_to_id(self, name):
-        for t_id, t_name in self.transitions.items():
-            if t_name == name:
-                return t_id
-        return None
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
+
+    def transition_name_to_ids(self, name):
+        return list(self.name_to_ids.get(name, ()))
 
 
 def dependency_graph_inline(log):
@@ -75,12 +80,15 @@ def dependency_graph_inline(log):
     return dependency_graph
 
 
-def read_from_file(filename):
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     xes = {'xes': 'http://www.xes-standard.org/'}
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    cases = {}
-    for trace in root.findall('xes:trace', xes):
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
         case_id = trace.find('xes:string[@key="concept:name"]', xes).attrib['value']
         events = []
         for event in trace.findall('xes:event', xes):
@@ -99,16 +107,72 @@ def read_from_file(filename):
                     event_dict[key] = value
             events.append(event_dict)
 
+        root.clear()
+        yield case_id, events
+
+
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    cases = {}
+    for case_id, events in iter_traces(filename):
         cases[case_id] = events
     return cases
 
-def check_sets(A, B, set_to_check):
-    for activity in A:
-        for activity2 in B:
-            if (activity, activity2) not in set_to_check:
-                return False
-
-    return True
+LEFT = 0
+RIGHT = 1
+
+def bron_kerbosch(adjacency, clique, candidates, excluded):
+    # Maximal cliques containing `clique`, extended from `candidates` and not
+    # from `excluded` (Bron–Kerbosch with Tomita pivoting).
+    if not candidates and not excluded:
+        yield clique
+        return
+    pivot = max(candidates | excluded, key=lambda node: len(adjacency[node] & candidates))
+    for node in list(candidates - adjacency[pivot]):
+        yield from bron_kerbosch(adjacency, clique | {node}, candidates & adjacency[node], excluded & adjacency[node])
+        candidates.discard(node)
+        excluded.add(node)
+
+def compatibility_graph(choice_relations, causalities):
+    # One LEFT node per activity that can sit in a place's input set and one
+    # RIGHT node per activity that can sit in its output set. Two nodes on the
+    # same side are linked when their activities are in #, a LEFT and a RIGHT
+    # node when the first causally precedes the second. Activities that are
+    # not in # with themselves (self-loops) never appear in a place.
+    nodes = [(LEFT, a) for a in {a for a, _ in causalities if (a, a) in choice_relations}]
+    nodes += [(RIGHT, b) for b in {b for _, b in causalities if (b, b) in choice_relations}]
+    adjacency = {node: set() for node in nodes}
+    for node_1, node_2 in itertools.combinations(nodes, 2):
+        (side_1, t1), (side_2, t2) = node_1, node_2
+        if side_1 == side_2:
+            linked = (t1, t2) in choice_relations
+        elif side_1 == LEFT:
+            linked = (t1, t2) in causalities
+        else:
+            linked = (t2, t1) in causalities
+        if linked:
+            adjacency[node_1].add(node_2)
+            adjacency[node_2].add(node_1)
+    return adjacency
+
+def maximal_place_pairs(transitions, choice_relations, causalities):
+    # The maximal (A, B) pairs of the alpha algorithm: A and B pairwise in #
+    # and A x B causal. Such a pair is a clique of the compatibility graph
+    # with nodes on both sides, and it is maximal exactly when the clique is,
+    # so the pairs come straight out of a maximal clique search instead of
+    # a filter over every pair of subsets. Tuples list the activities in the
+    # iteration order of `transitions`, like itertools.combinations does.
+    order = {transition: i for i, transition in enumerate(transitions)}
+    adjacency = compatibility_graph(choice_relations, causalities)
+    pairs = set()
+    for clique in bron_kerbosch(adjacency, set(), set(adjacency), set()):
+        pre_set = tuple(sorted((t for side, t in clique if side == LEFT), key=order.get))
+        post_set = tuple(sorted((t for side, t in clique if side == RIGHT), key=order.get))
+        if pre_set and post_set:
+            pairs.add((pre_set, post_set))
+    return pairs
 
 def alpha(log):
     pn = PetriNet()
@@ -154,30 +218,8 @@ def alpha(log):
         else:
             parallel.add((x, y))
 
-    xl = set()
-    subsets = set()
-
-    for a in range(1, len(transitions)):
-        for combination in list(itertools.combinations(transitions, a)):
-            subsets.add(combination)
-
-    for combination in subsets:
-        if check_sets(combination, combination, choices):
-            for combination2 in subsets:
-                if check_sets(combination2, combination2, choices):
-                    if check_sets(combination, combination2, causalities):
-                        xl.add((combination, combination2))
-
-    # Remove all non-maximal pairs
-    """ Step 4: Remove all non-maximal pairs """
-    yl = xl.copy()
-    for x in xl:
-        a = set(x[0])
-        b = set(x[1])
-        for y in xl:
-            if a.issubset(y[0]) and b.issubset(y[1]):
-                if x != y:
-                    yl.discard(x)
+    """ Step 4: Calculate the maximal pairs """
+    yl = maximal_place_pairs(transitions, choices, causalities)
 
     """ Step 5: Create Petri net"""
     # Add transitions
@@ -9,7 +9,7 @@ class PetriNet():
         self.transitions = {}
         self.input_edges = {}
         self.output_edges = {}
-        self.name_to_id = {}
+        self.name_to_ids = {}
 
     def add_place(self, name):
         if name not in self.places:
@@ -19,7 +19,7 @@ class PetriNet():
     def add_transition(self, name, transition_id):
         if transition_id not in self.transitions:
             self.transitions[transition_id] = name
-            self.name_to_id[name] = transition_id
+            self.name_to_ids.setdefault(name, []).append(transition_id)
         return self
 
     def add_edge(self, source, target):
@@ -60,7 +60,11 @@ class PetriNet():
         return self
 
     def transition_name_to_id(self, name):
-        return self.name_to_id.get(name, None)
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
+
+    def transition_name_to_ids(self, name):
+        return list(self.name_to_ids.get(name, ()))
 
 def build_dependency_graph(log):
     dependency_graph = {}
@@ -79,12 +83,59 @@ def build_dependency_graph(log):
             dependency_graph[current_task][next_task] += 1
     return dependency_graph
 
-def are_pairs_in_set(A, B, target_set):
-    for item_A in A:
-        for item_B in B:
-            if (item_A, item_B) not in target_set:
-                return False
-    return True
+LEFT = 0
+RIGHT = 1
+
+def bron_kerbosch(adjacency, clique, candidates, excluded):
+    # Maximal cliques containing `clique`, extended from `candidates` and not
+    # from `excluded` (Bron–Kerbosch with Tomita pivoting).
+    if not candidates and not excluded:
+        yield clique
+        return
+    pivot = max(candidates | excluded, key=lambda node: len(adjacency[node] & candidates))
+    for node in list(candidates - adjacency[pivot]):
+        yield from bron_kerbosch(adjacency, clique | {node}, candidates & adjacency[node], excluded & adjacency[node])
+        candidates.discard(node)
+        excluded.add(node)
+
+def compatibility_graph(choice_relations, causalities):
+    # One LEFT node per activity that can sit in a place's input set and one
+    # RIGHT node per activity that can sit in its output set. Two nodes on the
+    # same side are linked when their activities are in #, a LEFT and a RIGHT
+    # node when the first causally precedes the second. Activities that are
+    # not in # with themselves (self-loops) never appear in a place.
+    nodes = [(LEFT, a) for a in {a for a, _ in causalities if (a, a) in choice_relations}]
+    nodes += [(RIGHT, b) for b in {b for _, b in causalities if (b, b) in choice_relations}]
+    adjacency = {node: set() for node in nodes}
+    for node_1, node_2 in itertools.combinations(nodes, 2):
+        (side_1, t1), (side_2, t2) = node_1, node_2
+        if side_1 == side_2:
+            linked = (t1, t2) in choice_relations
+        elif side_1 == LEFT:
+            linked = (t1, t2) in causalities
+        else:
+            linked = (t2, t1) in causalities
+        if linked:
+            adjacency[node_1].add(node_2)
+            adjacency[node_2].add(node_1)
+    return adjacency
+
+def maximal_place_pairs(transitions, choice_relations, causalities):
+    # The maximal (A, B) pairs of the alpha algorithm: A and B pairwise in #
+    # and A x B causal. Such a pair is a clique of the compatibility graph
+    # with nodes on both sides, and it is maximal exactly when the clique is,
+    # so the pairs come straight out of a maximal clique search instead of
+    # a filter over every pair of subsets. Tuples list the activities in the
+    # iteration order of `transitions`, like itertools.combinations does.
+    order = {transition: i for i, transition in enumerate(transitions)}
+    adjacency = compatibility_graph(choice_relations, causalities)
+    pairs = set()
+    for clique in bron_kerbosch(adjacency, set(), set(adjacency), set()):
+        pre_set = tuple(sorted((t for side, t in clique if side == LEFT), key=order.get))
+        post_set = tuple(sorted((t for side, t in clique if side == RIGHT), key=order.get))
+        if pre_set and post_set:
+            pairs.add((pre_set, post_set))
+    return pairs
 
 def alpha(log):
     pn = PetriNet()
@@ -119,28 +170,7 @@ def alpha(log):
         else:
             parallel_relations.add((source, target))
 
-    candidate_pairs = set()
-    subsets = set()
-
-    for size in range(1, len(transitions) + 1):
-        for subset in itertools.combinations(transitions, size):
-            subsets.add(subset)
-
-    for subset_1 in subsets:
-        if are_pairs_in_set(subset_1, subset_1, choice_relations):
-            for subset_2 in subsets:
-                if are_pairs_in_set(subset_2, subset_2, choice_relations):
-                    if are_pairs_in_set(subset_1, subset_2, causalities):
-                        candidate_pairs.add((subset_1, subset_2))
-
-    maximal_pairs = candidate_pairs.copy()
-    for pair in candidate_pairs:
-        set_a = set(pair[0])
-        set_b = set(pair[1])
-        for other_pair in candidate_pairs:
-            if set_a.issubset(other_pair[0]) and set_b.issubset(other_pair[1]):
-                if pair != other_pair:
-                    maximal_pairs.discard(pair)
+    maximal_pairs = maximal_place_pairs(transitions, choice_relations, causalities)
 
     for transition in transitions:
         pn.add_transition(transition, f"{transition}")
@@ -164,17 +194,23 @@ def alpha(log):
 
     return pn
 
-def read_from_file(filename):
+def iter_traces(filename):
+    # Incremental parse: each trace is yielded as soon as it is closed and then
+    # dropped from the tree, so memory is bounded by the largest trace.
     xes = {'xes': 'http://www.xes-standard.org/'}
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    cases = {}
-    for trace in root.findall('xes:trace', xes):
+    context = ET.iterparse(filename, events=('start', 'end'))
+    _, root = next(context)
+    # Ids seen so far, to number traces without one as the dictionary did.
+    case_ids = set()
+    for event_type, trace in context:
+        if event_type != 'end' or trace.tag != '{http://www.xes-standard.org/}trace':
+            continue
         case_id_element = trace.find('xes:string[@key="concept:name"]', xes)
         if case_id_element is not None:
             case_id = case_id_element.attrib['value']
         else:
-            case_id = str(len(cases) + 1)
+            case_id = str(len(case_ids) + 1)
+        case_ids.add(case_id)
         events = []
         for event in trace.findall('xes:event', xes):
             event_dict = {}
@@ -195,5 +231,15 @@ def read_from_file(filename):
                     event_dict[key] = value
             events.append(event_dict)
 
+        root.clear()
+        yield case_id, events
+
+
+def read_from_file(filename, stream=False):
+    if stream:
+        return iter_traces(filename)
+
+    cases = {}
+    for case_id, events in iter_traces(filename):
         cases[case_id] = events
-    return cases
\ No newline at end of file
+    return cases
@@ -1,10 +1,11 @@
-import xml.etree.ElementTree as ET
-from datetime import datetime
-import copy
+from petri_matrix import CompiledNet
+from variants import VariantIndex
+from xes_reader import ALPHA_ATTRIBUTES, REPLAY_ATTRIBUTES, read_from_file
 class PetriNet:
     def __init__(self):
         self.places = {}
         self.transitions = {}
+        self.name_to_ids = {}
         self.edges = {}
         self.m = self.c = self.r = 0.0
         self.p = 1.0
@@ -16,6 +17,9 @@ class PetriNet:
         return self
 
     def add_transition(self, name, id):
+        if id in self.transitions:
+            self.name_to_ids[self.transitions[id]['name']].remove(id)
+        self.name_to_ids.setdefault(name, []).append(id)
         self.transitions[id] = {
             'name': name,
             'inputs': set(),
@@ -57,72 +61,20 @@ class PetriNet:
                 self.places[place] += 1
                 self.p += 1
         return self
+    def compile(self):
+        # Frozen incidence-matrix copy of the net with the current marking;
+        # keep building with add_place/add_transition/add_edge and compile
+        # again after changes.
+        return CompiledNet.from_net(self.places, self.transitions)
     def transition_name_to_id(self, name):
-        for transition_id, transition_data in self.transitions.items():
-            if transition_data['name'] == name:
-                return transition_id
-        return None
-def read_from_file(filename):
-    log_dict = {}
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    namespace = "{http://www.xes-standard.org/}"
-    for trace in root.findall(f"{namespace}trace"):
-        case_id = None
-        events = []
-        for string in trace.findall(f"{namespace}string"):
-            if string.attrib.get("key") == "concept:name":
-                case_id = string.attrib.get("value")
-                break
-        if case_id is None:
-            continue
-        for event in trace.findall(f"{namespace}event"):
-            event_data = {}
-            for string in event.findall(f"{namespace}string"):
-                key = string.attrib.get("key")
-                value = string.attrib.get("value")
-                if key and value is not None:
-                    event_data[key] = value
-
-            for date in event.findall(f"{namespace}date"):
-                key = date.attrib.get("key")
-                date_value = date.attrib.get("value")
-                if key and date_value is not None:
-                    try:
-                        dt = datetime.strptime(date_value, "%Y-%m-%dT%H:%M:%S.%f")
-                    except ValueError:
-                        try:
-                            dt = datetime.strptime(date_value, "%Y-%m-%dT%H:%M:%S%z")
-                        except ValueError:
-                            dt = date_value
-                    if isinstance(dt, datetime):
-                       event_data[key] = dt.replace(tzinfo=None)
-                    else:
-                        event_data[key] = dt
-            for int_val in event.findall(f"{namespace}int"):
-                key = int_val.attrib.get("key")
-                value = int_val.attrib.get("value")
-                if key and value is not None:
-                    try:
-                        event_data[key] = int(value)
-                    except ValueError:
-                        event_data[key] = value
-            for float_val in event.findall(f"{namespace}float"):
-                key = float_val.attrib.get("key")
-                value = float_val.attrib.get("value")
-                if key and value is not None:
-                    try:
-                        event_data[key] = float(value)
-                    except ValueError:
-                        event_data[key] = value
-            events.append(event_data)
-        log_dict[case_id] = events
-    return log_dict
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
+    def transition_name_to_ids(self, name):
+        return list(self.name_to_ids.get(name, ()))
 transitions_unique = set()
 def alpha(log_dict):
     follows = {}
-    for case_id, events in log_dict.items():
-        tasks = [event['concept:name'] for event in events]
+    for tasks, count in VariantIndex.from_log(log_dict).items():
         for i in range(len(tasks) - 1):
             source = tasks[i]
             target = tasks[i + 1]
@@ -132,7 +84,7 @@ def alpha(log_dict):
                 follows[source] = {}
             if target not in follows[source]:
                 follows[source][target] = 0
-            follows[source][target] += 1
+            follows[source][target] += count
     pn.add_place(1)
     pn.add_marking(1)
     transition_with_id = {}
@@ -165,57 +117,50 @@ def alpha(log_dict):
             p_id+= 1
     return pn
 def get_value_k(log):
-    traces = set()
-    trac_with_n = {}
-    for case_id, events in log.items():
-        trace = []
-        for event in events:
-            if 'concept:name' in event:
-                trace.append(event['concept:name'])
-        traces.add(tuple(trace))
-    for i in traces:
-        n =0
-        for case_id, events in log.items():
-            trace = []
-            for event in events:
-                if 'concept:name' in event:
-                    trace.append(event['concept:name'])
-            if tuple(trace) == i:
-                n += 1
-        trac_with_n[i] = n
-    return trac_with_n,traces
+    variants = VariantIndex.from_log(log)
+    return variants.counts(), set(variants)
 pn = PetriNet()
 def fitness_token_replay(log, mined_model):
-    last_events = log[next(iter(log))][-1]['concept:name']
+    log = VariantIndex.from_log(log)
+    last_events = next(iter(log))[-1]
     n =[]
     m =[]
     c =[]
     r =[]
     p =[]
     trac_with_n, traces = get_value_k(log)
+    # Replay on the incidence matrices; a transition that is not enabled gets
+    # a token put into each input place first (as in fire_transition), so it
+    # only adds its output column.
+    net = mined_model.compile()
+    consumes = net.pre.sum(axis=0)
+    produces = net.post.sum(axis=0)
+    last_outputs = net.post[:, net.transition_index[mined_model.transition_name_to_id(last_events)]] > 0
     for trace in traces:
-        pn.n = trac_with_n[trace]
-        pn.reset_para()
-        m_places = copy.deepcopy(pn.places)
+        net.reset()
+        mi = ci = 0.0
+        pi = 1.0
         for a in trace:
             if a in transitions_unique:
-                mined_model.fire_transition(mined_model.transition_name_to_id(a))
-        last_events_id = mined_model.transition_name_to_id(last_events)
-        for place in pn.transitions[last_events_id]['outputs']:
-            if pn.places[place] == 0:
-                pn.places[place] += 1
-                pn.m += 1
-        for place in pn.transitions[last_events_id]['outputs']:
-            pn.places[place] -= 1
-            pn.c += 1
-        for i in pn.places.keys():
-            pn.r += pn.places[i]
-        n.append(pn.n)
-        m.append(pn.m)
-        c.append(pn.c)
-        r.append(pn.r)
-        p.append(pn.p)
-        pn.places = copy.deepcopy(m_places)
+                t_id = mined_model.transition_name_to_id(a)
+                col = net.transition_index[t_id]
+                if net.is_enabled(t_id):
+                    net.fire(t_id)
+                else:
+                    mi += consumes[col]
+                    net.marking += net.post[:, col]
+                ci += consumes[col]
+                pi += produces[col]
+        empty = last_outputs & (net.marking == 0)
+        net.marking[empty] += 1
+        mi += int(empty.sum())
+        net.marking[last_outputs] -= 1
+        ci += int(last_outputs.sum())
+        n.append(trac_with_n[trace])
+        m.append(float(mi))
+        c.append(float(ci))
+        r.append(float(net.marking.sum()))
+        p.append(float(pi))
     conformance = calculate_f(n,m,c,r,p)
     return conformance
 def calculate_f(ni, mi, ci, ri, pi):
@@ -234,8 +179,8 @@ def calculate_f(ni, mi, ci, ri, pi):
 
 
 if __name__ == "__main__":
-    log = read_from_file("extension-log-4.xes")
-    log_noisy = read_from_file("extension-log-noisy-4.xes")
+    log = VariantIndex.from_log(read_from_file("extension-log-4.xes", attributes=ALPHA_ATTRIBUTES))
+    log_noisy = VariantIndex.from_log(read_from_file("extension-log-noisy-4.xes", attributes=REPLAY_ATTRIBUTES))
     mined_model = alpha(log)
     print(round(fitness_token_replay(log, mined_model), 5))
     print(round(fitness_token_replay(log_noisy, mined_model), 5))
\ No newline at end of file
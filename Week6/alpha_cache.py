@@ -0,0 +1,96 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+# What pickle.load raises on a bad or stale file.
+UNPICKLING_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError,
+                     ValueError)
+
+
+def fingerprint(activities, initial, final, directly_follows):
+    # sha256 over exactly what alpha depends on: the activities, the start and
+    # end activities and the directly-follows pairs (not their counts), all
+    # by name and in sorted order, so re-ordered or re-counted logs with the
+    # same relation share a key.
+    payload = json.dumps([
+        sorted(activities),
+        sorted(initial),
+        sorted(final),
+        sorted([source, target] for source, target in directly_follows),
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AlphaCache:
+    # Content-addressed store for mined nets and footprints: an in-memory LRU
+    # of `capacity` entries in front of an optional directory of pickles.
+    # get() hands out deep copies, so replaying tokens on a returned net never
+    # changes the cached one.
+
+    def __init__(self, capacity=32, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = self.disk_hits = self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self.entries[key])
+        if self.directory is not None and os.path.exists(self.path(key)):
+            try:
+                with open(self.path(key), "rb") as source:
+                    value = pickle.load(source)
+            except UNPICKLING_ERRORS:
+                # Corrupt, truncated or written by code that no longer
+                # exists (e.g. a net class pickled from __main__): drop the
+                # file and mine again.
+                try:
+                    os.remove(self.path(key))
+                except OSError:
+                    pass
+            else:
+                self._remember(key, value)
+                self.disk_hits += 1
+                return copy.deepcopy(value)
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.directory is not None:
+            temporary = self.path(key) + ".tmp"
+            with open(temporary, "wb") as out:
+                pickle.dump(value, out, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.path(key))
+        return self
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,239 @@
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from footprint import bits
+
+
+class SubsumptionIndex:
+    # Set-trie over bitmasks: every stored mask is a path of its set bits in
+    # increasing order, so "is some stored mask a superset of q" only walks
+    # the branches that can still contain q's bits instead of comparing q
+    # with every stored mask.
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, mask):
+        node = self.root
+        for bit in bits(mask):
+            node = node.setdefault(bit, {})
+        self.size += 1
+
+    def has_superset(self, mask):
+        return self._superset(self.root, list(bits(mask)), 0)
+
+    def _superset(self, node, wanted, i):
+        if i == len(wanted):
+            return True
+        for bit, child in node.items():
+            if bit < wanted[i]:
+                if self._superset(child, wanted, i):
+                    return True
+            elif bit == wanted[i]:
+                if self._superset(child, wanted, i + 1):
+                    return True
+        return False
+
+    def __len__(self):
+        return self.size
+
+
+def bron_kerbosch(adjacency, clique, candidates, excluded, required=(), found=None, stop=None):
+    # Maximal cliques containing `clique`, extended from `candidates` and not
+    # from `excluded` (Bron–Kerbosch with Tomita pivoting). Node sets are
+    # bitmasks and adjacency[node] is the mask of the node's neighbours.
+    # Branches are cut as soon as they cannot reach every mask in `required`,
+    # or when everything they can still reach lies inside a clique already
+    # recorded in `found` (a SubsumptionIndex), so such cliques are never built.
+    # stop() is asked at every node; once it returns True the search unwinds
+    # without yielding anything more.
+    if stop is not None and stop():
+        return
+    reach = clique | candidates
+    for mask in required:
+        if not reach & mask:
+            return
+    if candidates and found and found.has_superset(reach):
+        return
+    if not candidates and not excluded:
+        if found is not None:
+            found.add(clique)
+        yield clique
+        return
+    pivot = max(bits(candidates | excluded), key=lambda node: (adjacency[node] & candidates).bit_count())
+    for node in bits(candidates & ~adjacency[pivot]):
+        bit = 1 << node
+        yield from bron_kerbosch(adjacency, clique | bit, candidates & adjacency[node], excluded & adjacency[node],
+                                 required, found, stop)
+        if stop is not None and stop():
+            return
+        candidates &= ~bit
+        excluded |= bit
+
+
+def compatibility_graph(footprint):
+    # Node i (< n) stands for activity i in a place's input set and node n + i
+    # for activity i in its output set. Two nodes on the same side are linked
+    # when their activities are in #, an input and an output node when the
+    # first causally precedes the second. Activities that are not in # with
+    # themselves (self-loops) never appear in a place. Returns the adjacency
+    # masks and the mask of all nodes.
+    n = len(footprint)
+    self_choice = 0
+    for i in range(n):
+        self_choice |= footprint.choice[i] & (1 << i)
+    left = right = 0
+    for i in range(n):
+        if footprint.causal[i] and self_choice >> i & 1:
+            left |= 1 << i
+        if footprint.inverse[i] and self_choice >> i & 1:
+            right |= 1 << i
+    adjacency = [0] * (2 * n)
+    for i in bits(left):
+        adjacency[i] = (footprint.choice[i] & left & ~(1 << i)) | (footprint.causal[i] & right) << n
+    for i in bits(right):
+        adjacency[n + i] = (footprint.choice[i] & right & ~(1 << i)) << n | (footprint.inverse[i] & left)
+    return adjacency, left | right << n
+
+
+def causal_components(footprint):
+    # Activity masks of the connected components of the undirected causal
+    # graph. Every place pair is causally connected, so no pair spans two
+    # components and each component can be mined on its own.
+    components = []
+    remaining = footprint.full
+    while remaining:
+        component = frontier = remaining & -remaining
+        while frontier:
+            reach = 0
+            for i in bits(frontier):
+                reach |= footprint.causal[i] | footprint.inverse[i]
+            frontier = reach & ~component
+            component |= frontier
+        components.append(component)
+        remaining &= ~component
+    return components
+
+
+def component_cliques(adjacency, nodes, n):
+    # Maximal two-sided cliques among `nodes`; runs in a worker process.
+    full = (1 << n) - 1
+    return list(bron_kerbosch(adjacency, 0, nodes, 0, (full, full << n), SubsumptionIndex()))
+
+
+def seed_cliques(adjacency, nodes, n, seeds):
+    # Maximal cliques owned by the given causal edges (i, j); runs in a worker
+    # process. Every input node of a two-sided clique is causally linked to
+    # every output node, so the clique owns exactly one seed: its lowest input
+    # node i and lowest output node n + j. Lower nodes on either side are
+    # excluded, not offered as candidates, so each worker only builds the
+    # cliques it owns and the union over all seeds has no duplicates.
+    found = SubsumptionIndex()
+    cliques = []
+    for i, j in seeds:
+        lower = (1 << i) - 1 | ((1 << j) - 1) << n
+        common = adjacency[i] & adjacency[n + j] & nodes
+        cliques.extend(bron_kerbosch(adjacency, 1 << i | 1 << n + j, common & ~lower, common & lower, (), found))
+    return cliques
+
+
+def decode_pairs(footprint, cliques):
+    # Clique masks as (input activities, output activities) tuples.
+    n = len(footprint)
+    return {(tuple(footprint.members(clique & footprint.full)), tuple(footprint.members(clique >> n)))
+            for clique in cliques}
+
+
+def maximal_place_pairs(footprint, workers=None):
+    # The maximal (A, B) pairs of the alpha algorithm: A and B pairwise in #
+    # and A x B causal. Such a pair is a clique of the compatibility graph
+    # with nodes on both sides, and it is maximal exactly when the clique is,
+    # so the pairs come straight out of a maximal clique search instead of
+    # a filter over every pair of subsets. One-sided cliques and branches
+    # dominated by a pair already found are pruned during the search. Tuples
+    # list the activities in footprint order, like itertools.combinations over
+    # the same activities.
+    #
+    # The search runs per causal component. workers > 1 instead spreads the
+    # causal edges over a process pool (see seed_cliques), so a log that is
+    # one connected component is still split. The pairs are the same either
+    # way.
+    n = len(footprint)
+    adjacency, nodes = compatibility_graph(footprint)
+    if workers is not None and workers > 1:
+        seeds = [(i, j) for i in bits(nodes & footprint.full) for j in bits(footprint.causal[i] & nodes >> n)]
+        # Round-robin chunks, a few per worker, so seeds with large
+        # neighbourhoods do not all land in one chunk.
+        chunks = [seeds[k::workers * 4] for k in range(min(len(seeds), workers * 4))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(seed_cliques, *zip(*[(adjacency, nodes, n, chunk) for chunk in chunks])))
+    else:
+        tasks = []
+        for component in causal_components(footprint):
+            component_nodes = nodes & (component | component << n)
+            if component_nodes:
+                tasks.append((adjacency, component_nodes, n))
+        results = [component_cliques(*task) for task in tasks]
+    pairs = set()
+    for cliques in results:
+        pairs |= decode_pairs(footprint, cliques)
+    return pairs
+
+
+def anytime_place_pairs(footprint, support, time_budget=None, memory_budget=None, progress=None):
+    # Maximal pairs in order of decreasing support, for when the full search
+    # may not finish. Every causal edge a -> b, strongest first by its
+    # directly-follows count in `support`, seeds a clique search from {a, b};
+    # a pair is reported under the first seed it contains. Stops, at the
+    # next node of the clique search, once time_budget seconds or
+    # memory_budget bytes of allocations traced since the call (allocations
+    # the caller had already traced do not count) are spent. Returns the
+    # pairs found and whether the search completed; progress(explored,
+    # remaining) counts seeds.
+    n = len(footprint)
+    adjacency, nodes = compatibility_graph(footprint)
+    seeds = [(i, j) for i in bits(nodes & footprint.full) for j in bits(footprint.causal[i] & nodes >> n)]
+    seeds.sort(key=lambda seed: support.get((footprint.activities[seed[0]], footprint.activities[seed[1]]), 0),
+               reverse=True)
+
+    started = time.perf_counter()
+    tracing = memory_budget is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if memory_budget is not None else 0
+    exhausted = False
+
+    def spent():
+        # Sticky, so a search cut short stays reported as incomplete even if
+        # memory is freed while it unwinds.
+        nonlocal exhausted
+        if not exhausted:
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                exhausted = True
+            elif memory_budget is not None and tracemalloc.get_traced_memory()[0] - baseline >= memory_budget:
+                exhausted = True
+        return exhausted
+
+    found = SubsumptionIndex()
+    seen = set()
+    pairs = []
+    try:
+        for explored, (i, j) in enumerate(seeds, start=1):
+            if spent():
+                break
+            seed = 1 << i | 1 << n + j
+            for clique in bron_kerbosch(adjacency, seed, adjacency[i] & adjacency[n + j] & nodes, 0, (), found, spent):
+                if clique not in seen:
+                    seen.add(clique)
+                    pairs.append((tuple(footprint.members(clique & footprint.full)),
+                                  tuple(footprint.members(clique >> n))))
+            if exhausted:
+                break
+            if progress is not None:
+                progress(explored, len(seeds) - explored)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    return pairs, not exhausted
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+def dfg_matrix(activities, case_offsets, n_activities):
+    # Directly-follows counts as an n x n matrix: consecutive positions form
+    # the pairs, the pairs that straddle two cases (or involve a missing
+    # activity, code -1) are masked out and one bincount does the counting.
+    activities = np.asarray(activities, dtype=np.int64)
+    if len(activities) < 2 or n_activities == 0:
+        return np.zeros((n_activities, n_activities), dtype=np.int64)
+    source = activities[:-1]
+    target = activities[1:]
+    keep = (source >= 0) & (target >= 0)
+    boundaries = np.asarray(case_offsets, dtype=np.int64)[1:-1] - 1
+    keep[boundaries[(boundaries >= 0) & (boundaries < len(keep))]] = False
+    counts = np.bincount(source[keep] * n_activities + target[keep], minlength=n_activities * n_activities)
+    return counts.reshape(n_activities, n_activities)
+
+
+def endpoint_counts(activities, case_offsets, n_activities):
+    # How often each activity starts and ends a (non-empty) case.
+    activities = np.asarray(activities)
+    offsets = np.asarray(case_offsets, dtype=np.int64)
+    non_empty = offsets[1:] > offsets[:-1]
+    firsts = activities[offsets[:-1][non_empty]]
+    lasts = activities[offsets[1:][non_empty] - 1]
+    starts = np.bincount(firsts[firsts >= 0], minlength=n_activities)
+    ends = np.bincount(lasts[lasts >= 0], minlength=n_activities)
+    return starts, ends
+
+
+class DependencyGraph:
+    # Read-only dict-of-dicts view over a directly-follows matrix, so callers
+    # keep writing df["A"]["B"]. Like the dictionary version, only activities
+    # with at least one successor appear as keys and rows hold non-zero counts.
+
+    def __init__(self, matrix, names):
+        self.matrix = matrix
+        self.names = list(names)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self._sources = np.flatnonzero(matrix.sum(axis=1)).tolist()
+        self._source_set = set(self._sources)
+
+    @classmethod
+    def from_log(cls, log):
+        return cls(dfg_matrix(log.ordered_activities, log.case_offsets, len(log.activity_names)), log.activity_names)
+
+    def pairs(self):
+        # (source code, target code) of every observed directly-follows pair.
+        sources, targets = np.nonzero(self.matrix)
+        return list(zip(sources.tolist(), targets.tolist()))
+
+    def row(self, code):
+        targets = np.flatnonzero(self.matrix[code])
+        return {self.names[target]: int(self.matrix[code, target]) for target in targets.tolist()}
+
+    def __getitem__(self, name):
+        code = self.codes.get(name)
+        if code is None or code not in self._source_set:
+            raise KeyError(name)
+        return self.row(code)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return self.codes.get(name) in self._source_set
+
+    def __iter__(self):
+        return (self.names[code] for code in self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def keys(self):
+        return [self.names[code] for code in self._sources]
+
+    def values(self):
+        return [self.row(code) for code in self._sources]
+
+    def items(self):
+        return [(self.names[code], self.row(code)) for code in self._sources]
+
+    def to_dict(self):
+        return dict(self.items())
@@ -0,0 +1,144 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+from variants import VariantIndex
+
+
+class DFGCounts:
+    # Mergeable directly-follows statistics keyed by activity name: edge,
+    # start and end counts plus the number of cases. merge() is associative
+    # and commutative, and the counts round-trip through JSON, so shards
+    # built in different processes, on different machines or from different
+    # days of data can be combined later without re-reading the raw logs.
+
+    def __init__(self, edges=None, starts=None, ends=None, cases=0):
+        self.edges = dict(edges or {})
+        self.starts = dict(starts or {})
+        self.ends = dict(ends or {})
+        self.cases = cases
+
+    def add_trace(self, activities, weight=1):
+        # weight counts the trace as that many identical cases (a variant).
+        if not activities:
+            return self
+        self.cases += weight
+        self.starts[activities[0]] = self.starts.get(activities[0], 0) + weight
+        self.ends[activities[-1]] = self.ends.get(activities[-1], 0) + weight
+        for pair in zip(activities, activities[1:]):
+            self.edges[pair] = self.edges.get(pair, 0) + weight
+        return self
+
+    def merge(self, other):
+        merged = DFGCounts(self.edges, self.starts, self.ends, self.cases + other.cases)
+        for target, source in ((merged.edges, other.edges), (merged.starts, other.starts),
+                               (merged.ends, other.ends)):
+            for key, count in source.items():
+                target[key] = target.get(key, 0) + count
+        return merged
+
+    __add__ = merge
+
+    def __eq__(self, other):
+        return (isinstance(other, DFGCounts) and self.cases == other.cases and self.edges == other.edges
+                and self.starts == other.starts and self.ends == other.ends)
+
+    def activities(self):
+        names = set(self.starts) | set(self.ends)
+        for source, target in self.edges:
+            names.add(source)
+            names.add(target)
+        return names
+
+    def dependency_graph(self):
+        dependency_graph = {}
+        for (source, target), count in self.edges.items():
+            dependency_graph.setdefault(source, {})[target] = count
+        return dependency_graph
+
+    def to_json(self):
+        return json.dumps({
+            "cases": self.cases,
+            "edges": [[source, target, count] for (source, target), count in sorted(self.edges.items())],
+            "starts": self.starts,
+            "ends": self.ends,
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        edges = {(source, target): count for source, target, count in data["edges"]}
+        return cls(edges, data["starts"], data["ends"], data["cases"])
+
+    def save(self, path):
+        with open(path, "w") as out:
+            out.write(self.to_json())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as source:
+            return cls.from_json(source.read())
+
+
+def merge_counts(shards):
+    return reduce(DFGCounts.merge, shards, DFGCounts())
+
+
+def _sequence_counts(sequences, weights=None):
+    counts = DFGCounts()
+    for i, activities in enumerate(sequences):
+        counts.add_trace(activities, 1 if weights is None else weights[i])
+    return counts
+
+
+def _columnar_counts(activities, case_offsets, names):
+    from dfg import dfg_matrix, endpoint_counts
+
+    matrix = dfg_matrix(activities, case_offsets, len(names))
+    starts, ends = endpoint_counts(activities, case_offsets, len(names))
+    sources, targets = matrix.nonzero()
+    return DFGCounts(
+        {(names[s], names[t]): int(matrix[s, t]) for s, t in zip(sources.tolist(), targets.tolist())},
+        {names[code]: int(starts[code]) for code in starts.nonzero()[0].tolist()},
+        {names[code]: int(ends[code]) for code in ends.nonzero()[0].tolist()},
+        int((case_offsets[1:] > case_offsets[:-1]).sum()),
+    )
+
+
+def log_partitions(log, parts):
+    # Splits the cases into `parts` contiguous groups. Columnar logs are cut
+    # along the case offsets (the activity column is sliced, not copied per
+    # event); dictionary logs become lists of activity-name sequences and a
+    # VariantIndex is split by variant, each sent with its multiplicity.
+    n_cases = len(log)
+    bounds = [n_cases * i // parts for i in range(parts + 1)]
+    if isinstance(log, VariantIndex):
+        variants = log.items()
+        for first, last in zip(bounds, bounds[1:]):
+            chunk = variants[first:last]
+            yield _sequence_counts, ([variant for variant, _ in chunk], [count for _, count in chunk])
+    elif hasattr(log, "case_offsets"):
+        for first, last in zip(bounds, bounds[1:]):
+            offsets = log.case_offsets[first:last + 1]
+            yield _columnar_counts, (log.ordered_activities[offsets[0]:offsets[-1]], offsets - offsets[0],
+                                     log.activity_names)
+    else:
+        cases = list(log.values())
+        for first, last in zip(bounds, bounds[1:]):
+            yield _sequence_counts, ([[event['concept:name'] for event in events] for events in cases[first:last]],)
+
+
+def _run(task):
+    function, args = task
+    return function(*args)
+
+
+def parallel_dfg_counts(log, workers=4):
+    # Map: every partition of cases is counted in its own process. Reduce: the
+    # partial DFGCounts are merged in partition order.
+    tasks = list(log_partitions(log, max(1, min(workers, len(log)))))
+    if len(tasks) <= 1:
+        return merge_counts(_run(task) for task in tasks)
+    with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+        return merge_counts(pool.map(_run, tasks))
@@ -0,0 +1,155 @@
+import math
+import random
+from statistics import NormalDist
+
+from variants import VariantIndex
+
+
+def case_sequences(log):
+    # (case id, activity-name sequence) of every case. Besides dictionary
+    # logs, EventLogs and VariantIndexes this accepts the (case_id, events)
+    # generator of read_from_file(stream=True), so a log that does not fit in
+    # memory is sampled in a single pass.
+    if isinstance(log, VariantIndex):
+        for variant, case_ids in log.cases.items():
+            for case_id in case_ids:
+                yield case_id, variant
+    elif hasattr(log, "case_offsets"):
+        names = log.activity_names
+        for case_id, sequence in zip(log.case_ids, log.activity_sequences()):
+            yield case_id, tuple(names[code] for code in sequence if code >= 0)
+    else:
+        for case_id, events in (log.items() if hasattr(log, "items") else log):
+            yield case_id, tuple(event['concept:name'] for event in events if 'concept:name' in event)
+
+
+def reservoir_sample(cases, size, seed=None):
+    # Algorithm R: a uniform sample of `size` items from an iterable of
+    # unknown length, plus the number of items seen.
+    rng = random.Random(seed)
+    sample = []
+    seen = 0
+    for seen, case in enumerate(cases, start=1):
+        if seen <= size:
+            sample.append(case)
+        else:
+            slot = rng.randrange(seen)
+            if slot < size:
+                sample[slot] = case
+    return sample, seen
+
+
+def wilson_interval(successes, n, z):
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+class SampledDFG:
+    # Directly-follows estimate from a uniform sample of n out of N cases.
+    #
+    # estimates[a][b] is the expected number of a -> b steps in the full log
+    # (N times the per-case mean of the sample) and intervals[a][b] its
+    # confidence interval (normal approximation with finite population
+    # correction). case_share[(a, b)] is the fraction of cases that contain
+    # the step, with a Wilson interval in case_share_intervals.
+    #
+    # Guarantee: with probability `confidence`, simultaneously for all k * k
+    # steps between the k activities of the sample (a union bound, so each
+    # step is held to (1 - confidence) / (k * k)), every step that occurs in
+    # at least detection_limit of the cases was observed and every
+    # case_share_intervals entry holds.
+    #
+    # Steps in fewer than detection_limit of the cases count as noise, in the
+    # sample and in the full log alike. An observed step is then present
+    # when its case share interval lies at or above the limit, noise
+    # (noise_edges) when it lies below, and uncertain (uncertain_edges) when
+    # it straddles the limit; unobserved steps are noise. stable_edges() are
+    # the present steps whose reverse is settled too: a -> b is stably causal
+    # (stable_causal()) when b -> a is noise and stably parallel when b -> a
+    # is present. uncertain_causal holds the present steps whose reverse is
+    # uncertain. On an exact sample the limit is 0 and every step is stable.
+
+    def __init__(self, sample, n_cases, confidence=0.95):
+        self.n_cases = n_cases
+        self.n_sampled = len(sample)
+        self.confidence = confidence
+        self.sample_log = VariantIndex()
+        for case_id, sequence in sample:
+            self.sample_log.cases.setdefault(sequence, []).append(case_id)
+
+        n, N = self.n_sampled, n_cases
+        activities = {activity for variant in self.sample_log for activity in variant}
+        error = (1 - confidence) / max(1, len(activities) ** 2)
+        z = NormalDist().inv_cdf(1 - error / 2)
+        exact = n >= N
+        if exact:
+            self.detection_limit = 0.0
+        else:
+            self.detection_limit = 1 - error ** (1 / n) if n else 1.0
+
+        # Per-edge sums of the per-case counts, their squares and the number
+        # of cases containing the edge; variants are counted once and weighted.
+        totals, squares, support = {}, {}, {}
+        for variant, multiplicity in self.sample_log.items():
+            per_case = {}
+            for pair in zip(variant, variant[1:]):
+                per_case[pair] = per_case.get(pair, 0) + 1
+            for pair, count in per_case.items():
+                totals[pair] = totals.get(pair, 0) + multiplicity * count
+                squares[pair] = squares.get(pair, 0) + multiplicity * count * count
+                support[pair] = support.get(pair, 0) + multiplicity
+
+        self.estimates = {}
+        self.intervals = {}
+        self.case_share = {}
+        self.case_share_intervals = {}
+        correction = 0.0 if exact or N <= 1 else (N - n) / (N - 1)
+        for (source, target), total in totals.items():
+            mean = total / n
+            variance = (squares[(source, target)] - n * mean * mean) / (n - 1) if n > 1 else 0.0
+            spread = z * math.sqrt(max(variance, 0.0) / n * correction) * N
+            estimate = N * mean
+            self.estimates.setdefault(source, {})[target] = estimate
+            # The full log holds at least the steps seen in the sample.
+            self.intervals.setdefault(source, {})[target] = (max(float(total), estimate - spread), estimate + spread)
+            share = support[(source, target)] / n
+            self.case_share[(source, target)] = share
+            if exact:
+                self.case_share_intervals[(source, target)] = (share, share)
+            else:
+                self.case_share_intervals[(source, target)] = wilson_interval(support[(source, target)], n, z)
+
+        limit = self.detection_limit
+        self.present_edges = {edge for edge, (low, _) in self.case_share_intervals.items() if low >= limit}
+        self.noise_edges = {edge for edge, (_, high) in self.case_share_intervals.items() if high < limit}
+        self.uncertain_edges = set(self.case_share) - self.present_edges - self.noise_edges
+        self.uncertain_causal = {(source, target) for source, target in self.present_edges
+                                 if (target, source) in self.uncertain_edges}
+
+    @property
+    def exact(self):
+        return self.n_sampled >= self.n_cases
+
+    def dependency_graph(self):
+        # Estimated counts rounded to the dict-of-dicts shape of
+        # build_dependency_graph.
+        return {source: {target: round(estimate) for target, estimate in row.items()}
+                for source, row in self.estimates.items()}
+
+    def stable_edges(self):
+        return self.present_edges - self.uncertain_causal
+
+    def stable_causal(self):
+        # a -> b with a -> b present and b -> a noise in the full log.
+        return {(source, target) for source, target in self.stable_edges()
+                if (target, source) not in self.present_edges}
+
+
+def sample_dependency_graph(log, size, confidence=0.95, seed=None):
+    sample, n_cases = reservoir_sample(case_sequences(log), size, seed)
+    return SampledDFG(sample, n_cases, confidence)
@@ -0,0 +1,322 @@
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from interning import Interner
+from xes_reader import COLUMN_KEYS
+
+EPOCH = datetime(1970, 1, 1)
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def timestamp_to_int(value):
+    # Naive datetimes become microseconds since the epoch; anything else
+    # (missing or undecodable dates) is stored as MISSING_TIMESTAMP.
+    if not isinstance(value, datetime):
+        return MISSING_TIMESTAMP
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def int_to_timestamp(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def ordering_index(timestamps, case_offsets):
+    # Per-case "already chronological" flags and, when some case is not, a
+    # global permutation that stably sorts those cases by timestamp and leaves
+    # every other position in place (None when every case is in order).
+    # Events without a timestamp keep their position and are skipped when
+    # looking for disorder: each timed event is compared with the last timed
+    # event before it in the same case.
+    timestamps = np.asarray(timestamps)
+    case_offsets = np.asarray(case_offsets)
+    case_sorted = np.ones(len(case_offsets) - 1, dtype=bool)
+    if len(timestamps) < 2:
+        return case_sorted, None
+    timed = timestamps != MISSING_TIMESTAMP
+    positions = np.arange(len(timestamps), dtype=np.int64)
+    last_timed = np.maximum.accumulate(np.where(timed, positions, -1))
+    previous = last_timed[:-1]
+    inversions = np.flatnonzero(timed[1:] & (previous >= 0)
+                                & (timestamps[1:] < timestamps[np.maximum(previous, 0)]))
+    cases = np.searchsorted(case_offsets, inversions + 1, side="right") - 1
+    # An inversion against the last timed event of an earlier case is not a
+    # disorder.
+    within = previous[inversions] >= case_offsets[cases]
+    unsorted = np.unique(cases[within])
+    if len(unsorted) == 0:
+        return case_sorted, None
+    case_sorted[unsorted] = False
+    order = positions
+    for case in unsorted.tolist():
+        start, end = int(case_offsets[case]), int(case_offsets[case + 1])
+        slots = start + np.flatnonzero(timed[start:end])
+        order[slots] = slots[np.argsort(timestamps[slots], kind="stable")]
+    return case_sorted, order
+
+
+# Storage kinds of an extra attribute column. Columns whose values all
+# share one type get a typed array (dates as microseconds since the epoch);
+# any other column, strings included, holds codes into its distinct values.
+EXTRA_TYPECODES = {'bool': 'b', 'int': 'q', 'float': 'd', 'date': 'q', 'code': 'i'}
+EXTRA_DTYPES = {'bool': np.bool_, 'int': np.int64, 'float': np.float64, 'date': np.int64, 'code': np.int32}
+
+
+def value_kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return 'date'
+    return 'code'
+
+
+def decode_extra(kind, value, names):
+    if kind == 'bool':
+        return bool(value)
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'date':
+        return int_to_timestamp(value)
+    return names[value]
+
+
+class ExtraColumnBuilder:
+    # Values of one extra attribute at the positions of the events that have
+    # it. The column starts typed after its first value and falls back to
+    # codes (interned by type and value, so 1, 1.0 and True stay apart) as
+    # soon as a value of another type, or an int outside int64, comes in.
+
+    def __init__(self):
+        self.kind = None
+        self.positions = array('q')
+        self.values = None
+        self.interner = None
+
+    def add(self, position, value):
+        kind = value_kind(value)
+        if self.kind is None:
+            self.kind = kind
+            self.values = array(EXTRA_TYPECODES[kind])
+            if kind == 'code':
+                self.interner = Interner()
+        elif kind != self.kind and self.kind != 'code':
+            self.to_codes()
+        if self.positions and self.positions[-1] == position:
+            # A later value for the same event replaces the earlier one.
+            self.positions.pop()
+            self.values.pop()
+        self.positions.append(position)
+        if self.kind == 'code':
+            self.values.append(self.interner.code((type(value), value)))
+        elif self.kind == 'date':
+            self.values.append(timestamp_to_int(value))
+        else:
+            try:
+                self.values.append(value)
+            except OverflowError:
+                self.to_codes()
+                self.values.append(self.interner.code((type(value), value)))
+        return self
+
+    def to_codes(self):
+        values = [decode_extra(self.kind, value, None) for value in self.values]
+        self.kind = 'code'
+        self.interner = Interner()
+        self.values = array('i', [self.interner.code((type(value), value)) for value in values])
+
+    def build(self, n_events):
+        present = np.zeros(n_events, dtype=bool)
+        values = np.full(n_events, -1 if self.kind == 'code' else 0, dtype=EXTRA_DTYPES[self.kind])
+        positions = np.frombuffer(self.positions, dtype=np.int64)
+        present[positions] = True
+        values[positions] = np.frombuffer(self.values, dtype=EXTRA_DTYPES[self.kind])
+        names = [value for _, value in self.interner.names] if self.kind == 'code' else []
+        return ExtraColumn(self.kind, present, values, names)
+
+
+class ExtraColumn:
+    # One attribute outside the four main columns over all events of a log:
+    # present[i] says whether event i has it and values[i] holds it, typed
+    # for kinds bool, int, float and date, and as a code into names for kind
+    # 'code'.
+
+    def __init__(self, kind, present, values, names=()):
+        self.kind = kind
+        self.present = present
+        self.values = values
+        self.names = list(names)
+
+    def get(self, position):
+        return decode_extra(self.kind, self.values[position], self.names)
+
+
+class EventLogBuilder:
+    def __init__(self):
+        self.case_ids = []
+        self.case_offsets = array('q', [0])
+        self.activities = array('i')
+        self.resources = array('i')
+        self.timestamps = array('q')
+        self.costs = array('d')
+        self.extras = {}  # attribute key -> ExtraColumnBuilder
+        self.activity_interner = Interner()
+        self.resource_interner = Interner()
+
+    def add_event(self, activity=None, resource=None, timestamp=None, cost=None, extra=None):
+        # extra: the event's other attributes. Each key gets a column of its
+        # own, as do column values the columns cannot give back as they were
+        # (undecoded dates, non-numeric costs and float costs that would read
+        # back as ints or go missing).
+        position = len(self.activities)
+        self.activities.append(-1 if activity is None else self.activity_interner.code(activity))
+        self.resources.append(-1 if resource is None else self.resource_interner.code(resource))
+        self.timestamps.append(timestamp_to_int(timestamp))
+        for key, value in (extra or {}).items():
+            self.add_extra(position, key, value)
+        if timestamp is not None and not isinstance(timestamp, datetime):
+            self.add_extra(position, 'time:timestamp', timestamp)
+        if isinstance(cost, (int, float)) and not isinstance(cost, bool):
+            self.costs.append(cost)
+            if isinstance(cost, float) and (cost != cost or cost.is_integer()):
+                self.add_extra(position, 'cost', cost)
+        else:
+            self.costs.append(float('nan'))
+            if cost is not None:
+                self.add_extra(position, 'cost', cost)
+        return self
+
+    def add_extra(self, position, key, value):
+        column = self.extras.get(key)
+        if column is None:
+            column = self.extras[key] = ExtraColumnBuilder()
+        column.add(position, value)
+        return self
+
+    def end_case(self, case_id):
+        self.case_ids.append(case_id)
+        self.case_offsets.append(len(self.activities))
+        return self
+
+    def add_trace(self, case_id, events):
+        for event in events:
+            self.add_event(event.get('concept:name'), event.get('org:resource'),
+                           event.get('time:timestamp'), event.get('cost'),
+                           {key: value for key, value in event.items() if key not in COLUMN_KEYS})
+        return self.end_case(case_id)
+
+    def build(self):
+        return EventLog(
+            self.case_ids,
+            np.frombuffer(self.case_offsets, dtype=np.int64),
+            np.frombuffer(self.activities, dtype=np.int32),
+            np.frombuffer(self.resources, dtype=np.int32),
+            np.frombuffer(self.timestamps, dtype=np.int64),
+            np.frombuffer(self.costs, dtype=np.float64),
+            self.activity_interner.names,
+            self.resource_interner.names,
+            {key: column.build(len(self.activities)) for key, column in self.extras.items()},
+        )
+
+
+class EventLog:
+    # Columnar event log: one array per attribute plus case offsets, so case i
+    # owns events case_offsets[i]:case_offsets[i + 1]. Activities and resources
+    # are integer codes into activity_names / resource_names (-1 = missing).
+    # Attributes outside the four columns live in `extras` (key ->
+    # ExtraColumn), so the mapping methods give the same case_id -> [event
+    # dict] view as the dictionary returned by read_from_file.
+
+    def __init__(self, case_ids, case_offsets, activities, resources, timestamps, costs,
+                 activity_names, resource_names, extras=None):
+        self.case_ids = list(case_ids)
+        self.case_offsets = case_offsets
+        self.activities = activities
+        self.resources = resources
+        self.timestamps = timestamps
+        self.costs = costs
+        self.activity_names = list(activity_names)
+        self.resource_names = list(resource_names)
+        self.extras = {} if extras is None else extras
+        self.case_index = {case_id: i for i, case_id in enumerate(self.case_ids)}
+        self.case_sorted, self.event_order = ordering_index(self.timestamps, self.case_offsets)
+        # Activity column in chronological order within each case; this is the
+        # column DFG, alpha and replay consume, so no consumer re-sorts.
+        self.ordered_activities = self.activities if self.event_order is None else self.activities[self.event_order]
+
+    @classmethod
+    def from_dict(cls, log):
+        builder = EventLogBuilder()
+        for case_id, events in log.items():
+            builder.add_trace(case_id, events)
+        return builder.build()
+
+    @property
+    def n_events(self):
+        return len(self.activities)
+
+    def case_bounds(self, index):
+        return int(self.case_offsets[index]), int(self.case_offsets[index + 1])
+
+    def event(self, position):
+        event_data = {}
+        activity = self.activities[position]
+        if activity >= 0:
+            event_data['concept:name'] = self.activity_names[activity]
+        resource = self.resources[position]
+        if resource >= 0:
+            event_data['org:resource'] = self.resource_names[resource]
+        timestamp = self.timestamps[position]
+        if timestamp != MISSING_TIMESTAMP:
+            event_data['time:timestamp'] = int_to_timestamp(timestamp)
+        cost = float(self.costs[position])
+        if cost == cost:
+            event_data['cost'] = int(cost) if cost.is_integer() else cost
+        for key, column in self.extras.items():
+            if column.present[position]:
+                event_data[key] = column.get(position)
+        return event_data
+
+    def events(self, index):
+        start, end = self.case_bounds(index)
+        return [self.event(position) for position in range(start, end)]
+
+    def activity_sequences(self):
+        # Per-case lists of activity codes (codes index activity_names), in
+        # chronological order.
+        offsets = self.case_offsets.tolist()
+        activities = self.ordered_activities.tolist()
+        return [activities[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def __len__(self):
+        return len(self.case_ids)
+
+    def __iter__(self):
+        return iter(self.case_ids)
+
+    def __contains__(self, case_id):
+        return case_id in self.case_index
+
+    def __getitem__(self, case_id):
+        return self.events(self.case_index[case_id])
+
+    def get(self, case_id, default=None):
+        if case_id not in self.case_index:
+            return default
+        return self[case_id]
+
+    def keys(self):
+        return list(self.case_ids)
+
+    def values(self):
+        return (self.events(i) for i in range(len(self.case_ids)))
+
+    def items(self):
+        return ((case_id, self.events(i)) for i, case_id in enumerate(self.case_ids))
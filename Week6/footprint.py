@@ -0,0 +1,70 @@
+CAUSAL = "->"
+INVERSE = "<-"
+PARALLEL = "||"
+CHOICE = "#"
+
+
+def bits(mask):
+    # Positions of the set bits of mask, lowest first.
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Footprint:
+    # The alpha footprint of a log stored as bitmasks: activity i owns bit
+    # 1 << i (in the order of `activities`) and every relation is one int per
+    # activity, e.g. causal[i] has bit j set when activities[i] -> activities[j].
+    # Checks over whole sets of activities become a few AND/compare operations
+    # instead of loops over pairs.
+
+    def __init__(self, activities, directly_follows):
+        self.activities = list(activities)
+        self.index = {activity: i for i, activity in enumerate(self.activities)}
+        n = len(self.activities)
+        self.full = (1 << n) - 1
+        follows = [0] * n
+        preceded = [0] * n
+        for source, target in directly_follows:
+            follows[self.index[source]] |= 1 << self.index[target]
+            preceded[self.index[target]] |= 1 << self.index[source]
+        self.causal = [follows[i] & ~preceded[i] for i in range(n)]
+        self.inverse = [preceded[i] & ~follows[i] for i in range(n)]
+        self.parallel = [follows[i] & preceded[i] for i in range(n)]
+        self.choice = [self.full & ~(follows[i] | preceded[i]) for i in range(n)]
+
+    def __len__(self):
+        return len(self.activities)
+
+    def mask(self, activities):
+        mask = 0
+        for activity in activities:
+            mask |= 1 << self.index[activity]
+        return mask
+
+    def members(self, mask):
+        return [self.activities[i] for i in bits(mask)]
+
+    def relation(self, a, b):
+        i, j = self.index[a], self.index[b]
+        bit = 1 << j
+        if self.causal[i] & bit:
+            return CAUSAL
+        if self.inverse[i] & bit:
+            return INVERSE
+        if self.parallel[i] & bit:
+            return PARALLEL
+        return CHOICE
+
+    def matrix(self):
+        # Row a, column b holds the relation between a and b.
+        return [[self.relation(a, b) for b in self.activities] for a in self.activities]
+
+    def __str__(self):
+        labels = [str(activity) for activity in self.activities]
+        width = max([len(label) for label in labels] + [2])
+        lines = [" " * width + " " + " ".join(label.rjust(width) for label in labels)]
+        for label, row in zip(labels, self.matrix()):
+            lines.append(label.rjust(width) + " " + " ".join(cell.rjust(width) for cell in row))
+        return "\n".join(lines)
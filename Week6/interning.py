@@ -0,0 +1,35 @@
+class Interner:
+    # Maps names (activities, resources) to dense integer codes 0..n-1 in order
+    # of first appearance, with reverse lookup through names[code].
+
+    def __init__(self, names=()):
+        self.codes = {}
+        self.names = []
+        for name in names:
+            self.code(name)
+
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def lookup(self, name):
+        # Like code(), but never adds: unknown names give None.
+        return self.codes.get(name)
+
+    def name(self, code):
+        return self.names[code]
+
+    def encode(self, names):
+        return [self.code(name) for name in names]
+
+    def decode(self, codes):
+        return [self.names[code] for code in codes]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.codes
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+from event_log import EventLog, ExtraColumn
+
+MAGIC = b"XESLOGC3"
+ALIGNMENT = 64
+COLUMNS = ("case_offsets", "activities", "resources", "timestamps", "costs")
+
+
+def snapshot_path(filename):
+    return f"{filename}.cache"
+
+
+def file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(filename, digest=True):
+    stat = os.stat(filename)
+    key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if digest:
+        key["sha256"] = file_digest(filename)
+    return key
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(log, filename, path=None, key=None, attributes=None):
+    # Layout: MAGIC, 8-byte header length, JSON header, then every column as
+    # raw little-endian bytes at a 64-byte aligned offset recorded in the header,
+    # then the pickled (key, kind, names) of the extra attribute columns. Extra
+    # column i is stored as the columns extra:<i>:present and extra:<i>:values.
+    path = path or snapshot_path(filename)
+    arrays = {name: np.ascontiguousarray(getattr(log, name)) for name in COLUMNS}
+    for i, column in enumerate(log.extras.values()):
+        arrays[f"extra:{i}:present"] = np.ascontiguousarray(column.present)
+        arrays[f"extra:{i}:values"] = np.ascontiguousarray(column.values)
+    extras = pickle.dumps([(key, column.kind, column.names) for key, column in log.extras.items()],
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    header = {
+        "source": key or source_key(filename),
+        "attributes": None if attributes is None else sorted(attributes),
+        "case_ids": log.case_ids,
+        "activity_names": log.activity_names,
+        "resource_names": log.resource_names,
+        "columns": {},
+    }
+    # Offsets depend on the header size, so lay the columns out against a
+    # generous header reservation and pad the JSON up to it.
+    reserved = _aligned(len(MAGIC) + 8 + len(json.dumps(header)) + 256 * (len(arrays) + 1))
+    offset = reserved
+    for name, values in arrays.items():
+        header["columns"][name] = {"dtype": values.dtype.newbyteorder("<").str,
+                                   "offset": offset, "length": len(values)}
+        offset = _aligned(offset + values.nbytes)
+    header["extras"] = {"offset": offset, "length": len(extras)}
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (reserved - len(MAGIC) - 8 - len(encoded))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(MAGIC)
+        out.write(len(encoded).to_bytes(8, "little"))
+        out.write(encoded)
+        for name, values in arrays.items():
+            out.seek(header["columns"][name]["offset"])
+            out.write(values.astype(header["columns"][name]["dtype"], copy=False).tobytes())
+        out.seek(header["extras"]["offset"])
+        out.write(extras)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path):
+    with open(path, "rb") as snapshot:
+        if snapshot.read(len(MAGIC)) != MAGIC:
+            return None
+        length = int.from_bytes(snapshot.read(8), "little")
+        return json.loads(snapshot.read(length))
+
+
+def is_fresh(header, filename, attributes=None):
+    # Size and mtime are the cheap check; when only the mtime moved (touch,
+    # copy, checkout) the content hash decides. A projected snapshot only
+    # serves requests for a subset of its attributes.
+    stored = header.get("attributes")
+    if stored is not None and (attributes is None or not set(attributes) <= set(stored)):
+        return False
+    stat = os.stat(filename)
+    source = header["source"]
+    if source["size"] != stat.st_size:
+        return False
+    if source["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return source["sha256"] == file_digest(filename)
+
+
+def load_snapshot(path, header=None):
+    header = header or read_header(path)
+    columns = {}
+    for name, column in header["columns"].items():
+        if column["length"] == 0:
+            columns[name] = np.empty(0, dtype=column["dtype"])
+        else:
+            columns[name] = np.memmap(path, dtype=column["dtype"], mode="r",
+                                      offset=column["offset"], shape=(column["length"],))
+    with open(path, "rb") as snapshot:
+        snapshot.seek(header["extras"]["offset"])
+        extras = pickle.loads(snapshot.read(header["extras"]["length"]))
+    extras = {key: ExtraColumn(kind, columns[f"extra:{i}:present"], columns[f"extra:{i}:values"], names)
+              for i, (key, kind, names) in enumerate(extras)}
+    return EventLog(header["case_ids"], columns["case_offsets"], columns["activities"],
+                    columns["resources"], columns["timestamps"], columns["costs"],
+                    header["activity_names"], header["resource_names"], extras)
+
+
+def load_or_build(filename, build, path=None, attributes=None):
+    # Returns the memory-mapped snapshot when it matches the source, otherwise
+    # parses with build(filename, attributes) and (re)writes the snapshot.
+    path = path or snapshot_path(filename)
+    if os.path.exists(path):
+        try:
+            header = read_header(path)
+        except (OSError, ValueError):
+            header = None
+        if header is not None and is_fresh(header, filename, attributes):
+            return load_snapshot(path, header)
+    key = source_key(filename)
+    log = build(filename, attributes)
+    write_snapshot(log, filename, path, key, attributes)
+    return log
@@ -1,14 +1,24 @@
-import xml.etree.ElementTree as ET
-from datetime import datetime
 import copy
 
+import numpy as np
+
+from alpha_places import (SubsumptionIndex, anytime_place_pairs, bron_kerbosch, compatibility_graph, decode_pairs,
+                          maximal_place_pairs)
+from footprint import Footprint, bits
+from interning import Interner
+from petri_matrix import CompiledNet
+from variants import VariantIndex
+from xes_reader import ALPHA_ATTRIBUTES, REPLAY_ATTRIBUTES, read_from_file
+
 class PetriNet:
     def __init__(self):
         self.places = {}
         self.transitions = {}
+        self.name_to_ids = {}  # label -> transition ids carrying it, in insertion order
         self.edges = {}
         self.missed_fires = self.completed_fires = self.rejections = 0.0
         self.priority = 1.0
+        self.partial = False
 
     def reset_parameters(self):
         self.missed_fires = self.completed_fires = self.rejections = 0.0
@@ -19,6 +29,9 @@ class PetriNet:
         return self
 
     def add_transition(self, transition_name, transition_id):
+        if transition_id in self.transitions:
+            self.name_to_ids[self.transitions[transition_id]['name']].remove(transition_id)
+        self.name_to_ids.setdefault(transition_name, []).append(transition_id)
         self.transitions[transition_id] = {
             'name': transition_name,
             'inputs': set(),
@@ -66,204 +79,343 @@ class PetriNet:
                 self.priority += 1
         return self
 
-    def get_transition_id(self, transition_name):
-        for transition_id, transition_data in self.transitions.items():
-            if transition_data['name'] == transition_name:
-                return transition_id
-        return None
-
+    def compile(self):
+        # Frozen incidence-matrix copy of the net with the current marking;
+        # keep building with add_place/add_transition/add_edge and compile
+        # again after changes.
+        return CompiledNet.from_net(self.places, self.transitions)
 
-def build_dependency_graph(log):
+    def get_transition_id(self, transition_name):
+        transition_ids = self.name_to_ids.get(transition_name)
+        return transition_ids[0] if transition_ids else None
+
+    def get_transition_ids(self, transition_name):
+        # Every transition labelled transition_name (labels may repeat).
+        return list(self.name_to_ids.get(transition_name, ()))
+
+
+START_PLACE = 1
+END_PLACE = 2
+
+
+def is_columnar(log):
+    return hasattr(log, "case_offsets")
+
+
+def activity_sequences(log, interner):
+    # Activity code sequence of every case (of every variant for a
+    # VariantIndex). An EventLog's codes index its own activity_names, so they
+    # are translated into `interner` (which may already hold other names) and
+    # events without an activity (-1) are dropped; dictionary logs and
+    # variants are interned on the way through.
+    if isinstance(log, VariantIndex):
+        return [interner.encode(variant) for variant in log]
+    if hasattr(log, "activity_sequences"):
+        table = [interner.code(name) for name in log.activity_names]
+        return [[table[code] for code in sequence if code >= 0] for sequence in log.activity_sequences()]
+    return [interner.encode(event['concept:name'] for event in events) for events in log.values()]
+
+
+def dependency_counts(sequences, weights=None):
+    counts = {}
+    for i, sequence in enumerate(sequences):
+        weight = 1 if weights is None else weights[i]
+        for pair in zip(sequence, sequence[1:]):
+            counts[pair] = counts.get(pair, 0) + weight
+    return counts
+
+
+def log_relations(log, interner):
+    # Activities, start activities, end activities and the directly-follows
+    # pairs of a log (with their counts), as interned codes. Columnar logs
+    # take the vectorised path in dfg.py.
+    if is_columnar(log):
+        from dfg import DependencyGraph, endpoint_counts
+
+        interner.encode(log.activity_names)
+        graph = DependencyGraph.from_log(log)
+        starts, ends = endpoint_counts(log.ordered_activities, log.case_offsets, len(log.activity_names))
+        directly_follows = {(source, target): int(graph.matrix[source, target]) for source, target in graph.pairs()}
+        initial_transitions = set(starts.nonzero()[0].tolist())
+        # Every activity either starts a case or directly follows another one.
+        transitions = initial_transitions | {target for _, target in directly_follows}
+        return transitions, initial_transitions, set(ends.nonzero()[0].tolist()), directly_follows
+
+    sequences = activity_sequences(log, interner)
+    # Variants count once per case, like the other dependency graphs.
+    weights = [count for _, count in log.items()] if isinstance(log, VariantIndex) else [1] * len(sequences)
+    weights = [weight for sequence, weight in zip(sequences, weights) if sequence]
+    sequences = [sequence for sequence in sequences if sequence]
+    transitions = set()
+    for sequence in sequences:
+        transitions.update(sequence)
+    initial_transitions = {sequence[0] for sequence in sequences}
+    final_transitions = {sequence[-1] for sequence in sequences}
+    return transitions, initial_transitions, final_transitions, dependency_counts(sequences, weights)
+
+
+def build_dependency_graph(log, workers=None, sample=None, confidence=0.95, seed=None):
+    # workers > 1 counts partitions of the cases in a process pool and merges
+    # the partial counts (see dfg_counts.DFGCounts for shard merging).
+    # sample=n reads a uniform reservoir sample of n cases instead and returns
+    # a dfg_sample.SampledDFG with estimated counts, confidence intervals and
+    # the uncertain edges; alpha(result.sample_log) mines the sample.
+    if sample is not None:
+        from dfg_sample import sample_dependency_graph
+
+        return sample_dependency_graph(log, sample, confidence, seed)
+    if workers is not None and workers > 1:
+        from dfg_counts import parallel_dfg_counts
+
+        return parallel_dfg_counts(log, workers).dependency_graph()
+    if is_columnar(log):
+        from dfg import DependencyGraph
+
+        return DependencyGraph.from_log(log)
+
+    interner = Interner()
+    weights = [count for _, count in log.items()] if isinstance(log, VariantIndex) else None
     dependency_graph = {}
-
-    for case, events in log.items():
-        for idx in range(len(events) - 1):
-            current_task = events[idx]['concept:name']
-            next_task = events[idx + 1]['concept:name']
-
-            if current_task not in dependency_graph:
-                dependency_graph[current_task] = {}
-
-            if next_task not in dependency_graph[current_task]:
-                dependency_graph[current_task][next_task] = 0
-
-            dependency_graph[current_task][next_task] += 1
+    for (current_task, next_task), count in dependency_counts(activity_sequences(log, interner), weights).items():
+        dependency_graph.setdefault(interner.name(current_task), {})[interner.name(next_task)] = count
     return dependency_graph
 
-def are_pairs_in_set(A, B, target_set):
-    for item_A in A:
-        for item_B in B:
-            if (item_A, item_B) not in target_set:
-                return False
-    return True
-
-def alpha(log):
+def relations_key(interner, transitions, initial_transitions, final_transitions, directly_follows):
+    # alpha_cache fingerprint of the (interned) relations of a log.
+    from alpha_cache import fingerprint
+
+    return fingerprint(interner.decode(transitions), interner.decode(initial_transitions),
+                       interner.decode(final_transitions),
+                       [(interner.name(source), interner.name(target)) for source, target in directly_follows])
+
+def footprint(log, cache=None):
+    # The ->, <-, || and # relations between the activities of a log, keyed
+    # by activity name (print it for the footprint table). cache is an
+    # alpha_cache.AlphaCache.
+    interner = Interner()
+    relations = log_relations(log, interner)
+    key = None if cache is None else "footprint-" + relations_key(interner, *relations)
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    transitions, _, _, directly_follows = relations
+    result = Footprint((interner.name(code) for code in sorted(transitions)),
+                       {(interner.name(source), interner.name(target)) for source, target in directly_follows})
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+def activity_transition_id(code):
+    # Activity codes 0, 1, 2, ... become transition ids -1, -2, -3, ...
+    return -(code + 1)
+
+def alpha_net(interner, transitions, initial_transitions, final_transitions, maximal_pairs):
+    # The Petri net of the alpha algorithm for interned activities and the
+    # maximal (A, B) pairs: one transition per activity, the start and end
+    # places and one place per pair.
     pn = PetriNet()
-    transitions = set()
-
-    for trace in log.values():
-        for event in trace:
-            transitions.add(event['concept:name'])
-
-    initial_transitions = {case_events[0]['concept:name'] for case_events in log.values()}
-    final_transitions = {case_events[-1]['concept:name'] for case_events in log.values()}
-
-    dependency_graph = build_dependency_graph(log)
+    for transition in sorted(transitions):
+        pn.add_transition(interner.name(transition), activity_transition_id(transition))
 
-    directly_follows = set()
-    causalities = set()
-    parallel_relations = set()
-    choice_relations = set()
-
-    for transition_1 in sorted(dependency_graph.keys()):
-        for transition_2 in sorted(dependency_graph[transition_1].keys()):
-            directly_follows.add((transition_1, transition_2))
-
-    for t1 in transitions:
-        for t2 in transitions:
-            if (t1, t2) not in directly_follows and (t2, t1) not in directly_follows:
-                choice_relations.add((t1, t2))
-
-    for (source, target) in directly_follows:
-        if (target, source) not in directly_follows:
-            causalities.add((source, target))
-        else:
-            parallel_relations.add((source, target))
-
-    candidate_pairs = set()
-    subsets = set()
-
-    for size in range(1, len(transitions) + 1):
-        for subset in itertools.combinations(transitions, size):
-            subsets.add(subset)
-
-    for subset_1 in subsets:
-        if are_pairs_in_set(subset_1, subset_1, choice_relations):
-            for subset_2 in subsets:
-                if are_pairs_in_set(subset_2, subset_2, choice_relations):
-                    if are_pairs_in_set(subset_1, subset_2, causalities):
-                        candidate_pairs.add((subset_1, subset_2))
-
-    maximal_pairs = candidate_pairs.copy()
-    for pair in candidate_pairs:
-        set_a = set(pair[0])
-        set_b = set(pair[1])
-        for other_pair in candidate_pairs:
-            if set_a.issubset(other_pair[0]) and set_b.issubset(other_pair[1]):
-                if pair != other_pair:
-                    maximal_pairs.discard(pair)
-
-    for transition in transitions:
-        pn.add_transition(transition, f"{transition}")
-
-    pn.add_place('start')
-    pn.add_marking('start')
+    pn.add_place(START_PLACE)
+    pn.add_token(START_PLACE)
     for activity in initial_transitions:
-        pn.add_edge('start', pn.transition_name_to_id(activity))
+        pn.add_edge(START_PLACE, activity_transition_id(activity))
 
-    pn.add_place('end')
+    pn.add_place(END_PLACE)
     for activity in final_transitions:
-        pn.add_edge(pn.transition_name_to_id(activity), 'end')
+        pn.add_edge(activity_transition_id(activity), END_PLACE)
 
-    for i, (pre_set, post_set) in enumerate(maximal_pairs):
-        place_name = f'p{i}'
-        pn.add_place(place_name)
+    for i, (pre_set, post_set) in enumerate(maximal_pairs, start=END_PLACE + 1):
+        pn.add_place(i)
         for event in pre_set:
-            pn.add_edge(pn.transition_name_to_id(event), place_name)
+            pn.add_edge(activity_transition_id(event), i)
         for event in post_set:
-            pn.add_edge(place_name, pn.transition_name_to_id(event))
+            pn.add_edge(i, activity_transition_id(event))
+    return pn
+
+def alpha(log, workers=None, time_budget=None, memory_budget=None, progress=None, cache=None):
+    # Relations, candidate pairs and places are all computed on interned
+    # activity codes, the relations as a bitmask Footprint; names only appear
+    # as transition labels in the net. workers > 1 mines the candidate places
+    # of independent causal components in separate processes.
+    #
+    # With a time_budget (seconds) or memory_budget (bytes) the places are
+    # mined in order of decreasing support instead and mining stops when a
+    # budget runs out; the net then holds the places found so far and
+    # pn.partial is True. progress(explored, remaining) is called after each
+    # causal edge searched.
+    #
+    # cache (an alpha_cache.AlphaCache) returns a copy of the net mined
+    # earlier for the same activities, start/end activities and
+    # directly-follows pairs; partial nets are not cached.
+    interner = Interner()
+    transitions, initial_transitions, final_transitions, directly_follows = log_relations(log, interner)
+    key = None
+    if cache is not None:
+        key = "alpha-" + relations_key(interner, transitions, initial_transitions, final_transitions, directly_follows)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    relations = Footprint(transitions, directly_follows)
+    partial = False
+    if time_budget is None and memory_budget is None and progress is None:
+        maximal_pairs = maximal_place_pairs(relations, workers)
+    else:
+        maximal_pairs, complete = anytime_place_pairs(relations, directly_follows, time_budget, memory_budget, progress)
+        partial = not complete
+
+    pn = alpha_net(interner, transitions, initial_transitions, final_transitions, maximal_pairs)
+    pn.partial = partial
 
+    if key is not None and not pn.partial:
+        cache.put(key, pn)
     return pn
 
-def read_from_file(filename):
-    xes = {'xes': 'http://www.xes-standard.org/'}
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    cases = {}
-    for trace in root.findall('xes:trace', xes):
-        case_id_element = trace.find('xes:string[@key="concept:name"]', xes)
-        if case_id_element is not None:
-            case_id = case_id_element.attrib['value']
-        else:
-            case_id = str(len(cases) + 1)
-        events = []
-        for event in trace.findall('xes:event', xes):
-            event_dict = {}
-            for element in event:
-                key = element.attrib['key']
-                value = element.attrib['value']
-
-                if key == 'time:timestamp':
-                    try:
-                        date = datetime.datetime.fromisoformat(value)
-                    except ValueError:
-                        date = datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
-                    date_no_tz = date.replace(tzinfo=None)
-                    event_dict[key] = date_no_tz
-                elif key == 'cost':
-                    event_dict['cost'] = int(value)
-                else:
-                    event_dict[key] = value
-            events.append(event_dict)
-
-        cases[case_id] = events
-    return cases
+class IncrementalAlphaMiner:
+    # Alpha miner for logs that grow by appending cases. It keeps the
+    # directly-follows counts, start/end activities and the maximal pairs
+    # mined last time. update() only records which activities gained a new
+    # directly-follows pair. net() re-mines just the pairs around those
+    # activities and returns a net equal to alpha() over all traces seen so
+    # far: the compatibility graph among the other activities is unchanged,
+    # so the pairs without a changed activity are the previous pairs cut down
+    # to the unchanged activities (unless a changed activity now extends
+    # them), and only the pairs with a changed activity are searched for,
+    # seeding the clique search from each changed activity in turn.
+
+    def __init__(self, log=None):
+        self.interner = Interner()
+        self.transitions = set()
+        self.initial_transitions = set()
+        self.final_transitions = set()
+        self.directly_follows = {}
+        self.pairs = None
+        self.changed = set()
+        self.recomputed = 0
+        if log is not None:
+            self.update(log)
+
+    def update(self, traces):
+        # traces: a dictionary log, EventLog, VariantIndex or an iterable of
+        # (case_id, events) pairs such as read_from_file(stream=True).
+        if not (isinstance(traces, VariantIndex) or is_columnar(traces) or hasattr(traces, "values")):
+            traces = dict(traces)
+        for sequence in activity_sequences(traces, self.interner):
+            if not sequence:
+                continue
+            self.transitions.update(sequence)
+            self.initial_transitions.add(sequence[0])
+            self.final_transitions.add(sequence[-1])
+            for pair in zip(sequence, sequence[1:]):
+                if pair not in self.directly_follows:
+                    self.directly_follows[pair] = 0
+                    self.changed.update(pair)
+                self.directly_follows[pair] += 1
+        return self
+
+    def net(self):
+        # recomputed counts the changed activities searched from (every
+        # activity on the first call).
+        self.recomputed = 0
+        if self.pairs is None:
+            relations = Footprint(sorted(self.transitions), self.directly_follows)
+            self.pairs = maximal_place_pairs(relations)
+            self.recomputed = len(relations)
+        elif self.changed:
+            self.pairs = self._remine()
+        self.changed = set()
+        return alpha_net(self.interner, self.transitions, self.initial_transitions, self.final_transitions,
+                         self.pairs)
+
+    def _remine(self):
+        relations = Footprint(sorted(self.transitions), self.directly_follows)
+        adjacency, nodes = compatibility_graph(relations)
+        n = len(relations)
+        full = relations.full
+        changed = relations.mask(self.changed)
+        changed |= changed << n
+        changed_nodes = nodes & changed
+        found = SubsumptionIndex()
+        cliques = set()
+
+        kept = set()
+        for pre_set, post_set in self.pairs:
+            clique = (relations.mask(pre_set) | relations.mask(post_set) << n) & ~changed
+            if clique & full and clique >> n:
+                kept.add(clique)
+        # Largest first, so a cut-down pair inside another one is dropped.
+        for clique in sorted(kept, key=int.bit_count, reverse=True):
+            if found.has_superset(clique):
+                continue
+            if any(clique & ~adjacency[node] == 0 for node in bits(changed_nodes)):
+                continue
+            found.add(clique)
+            cliques.add(clique)
+
+        # Each clique with a changed node is found from its first one.
+        searched = 0
+        for node in bits(changed_nodes):
+            cliques.update(bron_kerbosch(adjacency, 1 << node, adjacency[node] & nodes & ~searched,
+                                         adjacency[node] & searched, (full, full << n), found))
+            searched |= 1 << node
+        self.recomputed = len(self.changed)
+        return decode_pairs(relations, cliques)
 
 def fitness_token_replay(log, model):
+    # Every distinct variant is replayed once and its token counts are
+    # weighted by the number of cases that share it. log may already be a
+    # VariantIndex.
     total_produced = 0
     total_consumed = 0
     total_missing = 0
     total_remaining = 0
 
-    for case_id, trace in log.items():
-        # Reset the marking on the model for each trace replay
-        model.places = {place: 0 for place in model.places}  # Reset all places to 0
-        model.places['start'] = 1  # Place token in 'start' place (provided by environment)
+    # Replay runs on the incidence-matrix form of the model: enabling is a
+    # column compare, firing one vector add and the missing tokens come
+    # straight from the input column.
+    net = model.compile()
+    start_marking = np.zeros_like(net.marking)
+    start_marking[net.place_index[START_PLACE]] = 1  # Token in the start place (provided by environment)
+    not_end = np.ones(len(net.place_ids), dtype=bool)
+    if END_PLACE in net.place_index:
+        not_end[net.place_index[END_PLACE]] = False
+    consumes = net.pre.sum(axis=0)
+    produces = net.post.sum(axis=0)
+
+    for trace, multiplicity in VariantIndex.from_log(log).items():
+        # Reset the marking for each trace replay
+        net.marking[:] = start_marking
 
         produced = 0  # Tokens produced by transitions
         consumed = 0  # Tokens consumed by transitions
         missing = 0   # Missing tokens required for transitions
 
-        for event in trace:
-            transition_name = event['concept:name']
-            transition_id = model.transition_name_to_id(transition_name)
+        for transition_name in trace:
+            transition_id = model.get_transition_id(transition_name)
 
             if transition_id is None:
                 continue  # Skip if transition name is not in the model
 
-            input_places = model.input_edges.get(transition_id, [])
-            output_places = model.output_edges.get(transition_id, [])
-
-            if model.is_enabled(transition_id):
-                # Consume tokens from input places
-                for place in input_places:
-                    model.places[place] -= 1
-                    consumed += 1  # Count tokens consumed by transitions
-
-                # Produce tokens to output places
-                for place in output_places:
-                    model.places[place] += 1
-                    produced += 1  # Count tokens produced by transitions
-
+            if net.is_enabled(transition_id):
+                net.fire(transition_id)
+                column = net.transition_index[transition_id]
+                consumed += int(consumes[column])  # Count tokens consumed by transitions
+                produced += int(produces[column])  # Count tokens produced by transitions
             else:
                 # Transition is not enabled; count missing tokens
-                for place in input_places:
-                    required_tokens = 1  # Assuming arc weight is 1
-                    available_tokens = model.get_tokens(place)
-                    if available_tokens < required_tokens:
-                        missing += (required_tokens - available_tokens)
-
-        # Remaining tokens in places (excluding 'end' place)
-        remaining = sum(
-            tokens for place, tokens in model.places.items()
-            if place != 'end' and tokens > 0
-        )
+                missing += net.missing_tokens(transition_id)
+
+        # Remaining tokens in places (excluding the end place)
+        remaining = int(np.maximum(net.marking[not_end], 0).sum())
 
         # Accumulate totals
-        total_produced += produced
-        total_consumed += consumed
-        total_missing += missing
-        total_remaining += remaining
+        total_produced += multiplicity * produced
+        total_consumed += multiplicity * consumed
+        total_missing += multiplicity * missing
+        total_remaining += multiplicity * remaining
 
     # Compute fitness using the correct formula
     if (total_consumed + total_missing) > 0:
@@ -284,10 +436,11 @@ def fitness_token_replay(log, model):
     return fitness
 
 
-# Example usage:
-log = read_from_file("extension-log-4.xes")
-log_noisy = read_from_file("extension-log-noisy-4.xes")
+if __name__ == "__main__":
+    log = VariantIndex.from_log(read_from_file("extension-log-4.xes", attributes=ALPHA_ATTRIBUTES))
+    log_noisy = VariantIndex.from_log(read_from_file("extension-log-noisy-4.xes", attributes=REPLAY_ATTRIBUTES))
+
+    mined_model = alpha(log)
+    print("Fitness for clean log:", round(fitness_token_replay(log, mined_model), 5))
+    print("Fitness for noisy log:", round(fitness_token_replay(log_noisy, mined_model), 5))
 
-mined_model = alpha(log)
-print("Fitness for clean log:", round(fitness_token_replay(log, mined_model), 5))
-print("Fitness for noisy log:", round(fitness_token_replay(log_noisy, mined_model), 5))
@@ -1,11 +1,12 @@
-import xml.etree.ElementTree as ElemTree
-from datetime import datetime
-import copy
+from petri_matrix import CompiledNet
+from variants import VariantIndex
+from xes_reader import ALPHA_ATTRIBUTES, REPLAY_ATTRIBUTES, read_from_file
 
 class PetriNet:
     def __init__(self):
         self.places_dict = {}
         self.transitions_dict = {}
+        self.name_to_ids = {}  # label -> transition ids carrying it, in insertion order
         self.edges_dict = {}
         self.missing_tokens = self.consumed_tokens = self.remaining_tokens = 0.0
         self.produced_tokens = 1.0
@@ -19,6 +20,9 @@ class PetriNet:
         return self
 
     def add_transition(self, transition_name, transition_id):
+        if transition_id in self.transitions_dict:
+            self.name_to_ids[self.transitions_dict[transition_id]['name']].remove(transition_id)
+        self.name_to_ids.setdefault(transition_name, []).append(transition_id)
         self.transitions_dict[transition_id] = {
             'name': transition_name,
             'inputs': set(),
@@ -66,74 +70,24 @@ class PetriNet:
                 self.produced_tokens += 1
         return self
 
+    def compile(self):
+        # Frozen incidence-matrix copy of the net with the current marking;
+        # keep building with add_place/add_transition/add_edge and compile
+        # again after changes.
+        return CompiledNet.from_net(self.places_dict, self.transitions_dict)
+
     def get_transition_id_by_name(self, transition_name):
-        for trans_id, trans_data in self.transitions_dict.items():
-            if trans_data['name'] == transition_name:
-                return trans_id
-        return None
-
-def read_from_file(file_name):
-    log_data = {}
-    xml_tree = ElemTree.parse(file_name)
-    xml_root = xml_tree.getroot()
-    namespace = "{http://www.xes-standard.org/}"
-    for trace in xml_root.findall(f"{namespace}trace"):
-        case_id = None
-        events = []
-        for elem in trace.findall(f"{namespace}string"):
-            if elem.attrib.get("key") == "concept:name":
-                case_id = elem.attrib.get("value")
-                break
-        if case_id is None:
-            continue
-        for event in trace.findall(f"{namespace}event"):
-            event_details = {}
-            for elem in event.findall(f"{namespace}string"):
-                key = elem.attrib.get("key")
-                value = elem.attrib.get("value")
-                if key and value is not None:
-                    event_details[key] = value
-            for elem in event.findall(f"{namespace}date"):
-                key = elem.attrib.get("key")
-                date_value = elem.attrib.get("value")
-                if key and date_value is not None:
-                    try:
-                        dt = datetime.strptime(date_value, "%Y-%m-%dT%H:%M:%S.%f")
-                    except ValueError:
-                        try:
-                            dt = datetime.strptime(date_value, "%Y-%m-%dT%H:%M:%S%z")
-                        except ValueError:
-                            dt = date_value
-                    if isinstance(dt, datetime):
-                       event_details[key] = dt.replace(tzinfo=None)
-                    else:
-                        event_details[key] = dt
-            for elem in event.findall(f"{namespace}int"):
-                key = elem.attrib.get("key")
-                value = elem.attrib.get("value")
-                if key and value is not None:
-                    try:
-                        event_details[key] = int(value)
-                    except ValueError:
-                        event_details[key] = value
-            for elem in event.findall(f"{namespace}float"):
-                key = elem.attrib.get("key")
-                value = elem.attrib.get("value")
-                if key and value is not None:
-                    try:
-                        event_details[key] = float(value)
-                    except ValueError:
-                        event_details[key] = value
-            events.append(event_details)
-        log_data[case_id] = events
-    return log_data
+        transition_ids = self.name_to_ids.get(transition_name)
+        return transition_ids[0] if transition_ids else None
+
+    def get_transition_ids_by_name(self, transition_name):
+        return list(self.name_to_ids.get(transition_name, ()))
 
 unique_transitions_set = set()
 
 def alpha(log_data):
     follow_relations = {}
-    for case_id, events in log_data.items():
-        tasks_sequence = [event['concept:name'] for event in events]
+    for tasks_sequence, count in VariantIndex.from_log(log_data).items():
         for i in range(len(tasks_sequence) - 1):
             source = tasks_sequence[i]
             target = tasks_sequence[i + 1]
@@ -143,7 +97,7 @@ def alpha(log_data):
                 follow_relations[source] = {}
             if target not in follow_relations[source]:
                 follow_relations[source][target] = 0
-            follow_relations[source][target] += 1
+            follow_relations[source][target] += count
 
     petri_net.add_place(1)
     petri_net.add_marking(1)
@@ -181,59 +135,53 @@ def alpha(log_data):
     return petri_net
 
 def extract_trace_data(log):
-    unique_traces = set()
-    trace_counts = {}
-    for case_id, events in log.items():
-        trace_sequence = []
-        for event in events:
-            if 'concept:name' in event:
-                trace_sequence.append(event['concept:name'])
-        unique_traces.add(tuple(trace_sequence))
-    for trace in unique_traces:
-        count = 0
-        for case_id, events in log.items():
-            trace_sequence = []
-            for event in events:
-                if 'concept:name' in event:
-                    trace_sequence.append(event['concept:name'])
-            if tuple(trace_sequence) == trace:
-                count += 1
-        trace_counts[trace] = count
-    return trace_counts, unique_traces
+    variants = VariantIndex.from_log(log)
+    return variants.counts(), set(variants)
 
 petri_net = PetriNet()
 
 def fitness_token_replay(log, mined_model):
-    final_event = log[next(iter(log))][-1]['concept:name']
+    log = VariantIndex.from_log(log)
+    final_event = next(iter(log))[-1]
     trace_frequencies = []
     missing_counts = []
     consumed_counts = []
     remaining_counts = []
     produced_counts = []
     trace_counts, unique_traces = extract_trace_data(log)
+    # Replay on the incidence-matrix form of the model. A transition that is
+    # not enabled gets one token put into each of its input places first, as
+    # in fire_transition, so it only adds its output column.
+    net = mined_model.compile()
+    consumes = net.pre.sum(axis=0)
+    produces = net.post.sum(axis=0)
+    final_outputs = net.post[:, net.transition_index[mined_model.get_transition_id_by_name(final_event)]] > 0
     for trace in unique_traces:
-        petri_net.n_val = trace_counts[trace]
-        petri_net.reset_metrics()
-        initial_places = copy.deepcopy(petri_net.places_dict)
+        net.reset()
+        missing_tokens = consumed_tokens = 0.0
+        produced_tokens = 1.0
         for task in trace:
             if task in unique_transitions_set:
-                mined_model.fire_transition(mined_model.get_transition_id_by_name(task))
-        final_event_id = mined_model.get_transition_id_by_name(final_event)
-        for place in petri_net.transitions_dict[final_event_id]['outputs']:
-            if petri_net.places_dict[place] == 0:
-                petri_net.places_dict[place] += 1
-                petri_net.missing_tokens += 1
-        for place in petri_net.transitions_dict[final_event_id]['outputs']:
-            petri_net.places_dict[place] -= 1
-            petri_net.consumed_tokens += 1
-        for place in petri_net.places_dict.keys():
-            petri_net.remaining_tokens += petri_net.places_dict[place]
-        trace_frequencies.append(petri_net.n_val)
-        missing_counts.append(petri_net.missing_tokens)
-        consumed_counts.append(petri_net.consumed_tokens)
-        remaining_counts.append(petri_net.remaining_tokens)
-        produced_counts.append(petri_net.produced_tokens)
-        petri_net.places_dict = copy.deepcopy(initial_places)
+                transition_id = mined_model.get_transition_id_by_name(task)
+                column = net.transition_index[transition_id]
+                if net.is_enabled(transition_id):
+                    net.fire(transition_id)
+                else:
+                    missing_tokens += consumes[column]
+                    net.marking += net.post[:, column]
+                consumed_tokens += consumes[column]
+                produced_tokens += produces[column]
+        empty = final_outputs & (net.marking == 0)
+        net.marking[empty] += 1
+        missing_tokens += int(empty.sum())
+        net.marking[final_outputs] -= 1
+        consumed_tokens += int(final_outputs.sum())
+        remaining_tokens = float(net.marking.sum())
+        trace_frequencies.append(trace_counts[trace])
+        missing_counts.append(float(missing_tokens))
+        consumed_counts.append(float(consumed_tokens))
+        remaining_counts.append(remaining_tokens)
+        produced_counts.append(float(produced_tokens))
 
     conformance_score = compute_conformance(trace_frequencies, missing_counts, consumed_counts, remaining_counts, produced_counts)
     return conformance_score
@@ -246,8 +194,8 @@ def compute_conformance(frequencies, missing, consumed, remaining, produced):
     return 0.5 * (1 - numerator1 / denominator1) + 0.5 * (1 - numerator2 / denominator2)
 
 if __name__ == "__main__":
-    log_standard = read_from_file("extension-log-4.xes")
-    log_noisy = read_from_file("extension-log-noisy-4.xes")
+    log_standard = VariantIndex.from_log(read_from_file("extension-log-4.xes", attributes=ALPHA_ATTRIBUTES))
+    log_noisy = VariantIndex.from_log(read_from_file("extension-log-noisy-4.xes", attributes=REPLAY_ATTRIBUTES))
     mined_model = alpha(log_standard)
     print(round(fitness_token_replay(log_standard, mined_model), 5))
     print(round(fitness_token_replay(log_noisy, mined_model), 5))
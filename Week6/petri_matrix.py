@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class CompiledNet:
+    # A built PetriNet frozen into incidence matrices. Places and transitions
+    # get dense indices (rows and columns, in the net's insertion order),
+    # pre[p, t] / post[p, t] are the arc weights into and out of transition t
+    # and the marking is one int vector, so enabling is a column compare and
+    # firing a vector add. Transitions are still addressed by their ids in
+    # the source net.
+
+    def __init__(self, place_ids, transition_ids, names, pre, post, marking):
+        self.place_ids = list(place_ids)
+        self.place_index = {place: i for i, place in enumerate(self.place_ids)}
+        self.transition_ids = list(transition_ids)
+        self.transition_index = {transition: j for j, transition in enumerate(self.transition_ids)}
+        self.names = list(names)
+        self.pre = pre
+        self.post = post
+        self.change = post - pre
+        self.initial_marking = marking.copy()
+        self.marking = marking
+
+    @classmethod
+    def from_net(cls, places, transitions):
+        # places: place id -> tokens; transitions: transition id ->
+        # {'name', 'inputs', 'outputs'}, the layout of the Week6 PetriNets.
+        place_index = {place: i for i, place in enumerate(places)}
+        pre = np.zeros((len(places), len(transitions)), dtype=np.int64)
+        post = np.zeros_like(pre)
+        for j, transition in enumerate(transitions.values()):
+            for place in transition['inputs']:
+                pre[place_index[place], j] += 1
+            for place in transition['outputs']:
+                post[place_index[place], j] += 1
+        marking = np.fromiter(places.values(), dtype=np.int64, count=len(places))
+        return cls(places, transitions, [transition['name'] for transition in transitions.values()], pre, post,
+                   marking)
+
+    def tokens(self, place):
+        return int(self.marking[self.place_index[place]])
+
+    def is_enabled(self, transition_id):
+        return bool(np.all(self.marking >= self.pre[:, self.transition_index[transition_id]]))
+
+    def enabled_transitions(self):
+        enabled = np.all(self.marking[:, None] >= self.pre, axis=0)
+        return [self.transition_ids[j] for j in np.flatnonzero(enabled).tolist()]
+
+    def missing_tokens(self, transition_id):
+        # Tokens the transition's input places lack to enable it.
+        return int(np.maximum(self.pre[:, self.transition_index[transition_id]] - self.marking, 0).sum())
+
+    def fire(self, transition_id):
+        # Fires regardless of enabling, like the builder nets' forced firing;
+        # check is_enabled first for the strict semantics.
+        self.marking += self.change[:, self.transition_index[transition_id]]
+        return self
+
+    def reset(self):
+        self.marking[:] = self.initial_marking
+        return self
+
+    def to_marking(self):
+        return {place: int(tokens) for place, tokens in zip(self.place_ids, self.marking.tolist())}
@@ -0,0 +1,58 @@
+class VariantIndex:
+    # Trace variants of a log, built in one hashing pass: each distinct
+    # activity-name tuple maps to the ids of the cases that follow it, in log
+    # order. Discovery and replay work once per variant, weighted by count.
+
+    def __init__(self, cases=None):
+        self.cases = dict(cases or {})
+
+    @classmethod
+    def from_log(cls, log):
+        if isinstance(log, VariantIndex):
+            return log
+        cases = {}
+        if hasattr(log, "case_offsets"):
+            # Group on code tuples and only translate each variant once.
+            for case_id, sequence in zip(log.case_ids, log.activity_sequences()):
+                cases.setdefault(tuple(sequence), []).append(case_id)
+            # Code tuples that differ only in missing activities (-1) share
+            # a name tuple, so merge their cases (back into log order) rather
+            # than overwrite them.
+            names = log.activity_names
+            variants = {}
+            merged = set()
+            for variant, case_ids in cases.items():
+                variant = tuple(names[code] for code in variant if code >= 0)
+                if variant in variants:
+                    merged.add(variant)
+                variants.setdefault(variant, []).extend(case_ids)
+            for variant in merged:
+                variants[variant].sort(key=log.case_index.__getitem__)
+            return cls(variants)
+        for case_id, events in log.items():
+            variant = tuple(event['concept:name'] for event in events if 'concept:name' in event)
+            cases.setdefault(variant, []).append(case_id)
+        return cls(cases)
+
+    def count(self, variant):
+        return len(self.cases.get(variant, ()))
+
+    def counts(self):
+        return {variant: len(case_ids) for variant, case_ids in self.cases.items()}
+
+    def items(self):
+        # (variant, multiplicity) pairs.
+        return [(variant, len(case_ids)) for variant, case_ids in self.cases.items()]
+
+    @property
+    def total(self):
+        return sum(len(case_ids) for case_ids in self.cases.values())
+
+    def __iter__(self):
+        return iter(self.cases)
+
+    def __len__(self):
+        return len(self.cases)
+
+    def __contains__(self, variant):
+        return variant in self.cases
@@ -0,0 +1,284 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+NAMESPACE = "{http://www.xes-standard.org/}"
+TRACE = f"{NAMESPACE}trace"
+EVENT = f"{NAMESPACE}event"
+ROOT_TAG = re.compile(rb"<([A-Za-z_][\w.:-]*)")
+CODECS = (
+    ("gzip", b"\x1f\x8b", gzip.open),
+    ("bz2", b"BZh", bz2.open),
+    ("xz", b"\xfd7zXZ\x00", lzma.open),
+)
+COLUMN_KEYS = ("concept:name", "org:resource", "time:timestamp", "cost")
+# Event attributes the alpha miner and token replay read; pass them to
+# read_from_file(attributes=...) to skip decoding everything else.
+ALPHA_ATTRIBUTES = ("concept:name",)
+REPLAY_ATTRIBUTES = ("concept:name",)
+
+
+def parse_date(value):
+    # Python 3.11's fromisoformat reads every ISO-8601 layout XES writers
+    # emit (fractions of any length, "Z" and UTC offsets) in C. As before,
+    # the UTC offset is dropped rather than applied; undecodable values are
+    # kept as strings.
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        return value
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_boolean(value):
+    lowered = value.lower()
+    if lowered == "true":
+        return True
+    if lowered == "false":
+        return False
+    return value
+
+
+DECODERS = {
+    f"{NAMESPACE}string": str,
+    f"{NAMESPACE}date": parse_date,
+    f"{NAMESPACE}int": parse_int,
+    f"{NAMESPACE}float": parse_float,
+    f"{NAMESPACE}boolean": parse_boolean,
+}
+
+
+def decode_event(event, attributes=None):
+    # attributes: optional set of keys to keep; everything else is skipped
+    # before any value is decoded.
+    event_data = {}
+    for elem in event:
+        decoder = DECODERS.get(elem.tag)
+        if decoder is None:
+            continue
+        key = elem.attrib.get("key")
+        if not key or (attributes is not None and key not in attributes):
+            continue
+        value = elem.attrib.get("value")
+        if value is not None:
+            event_data[key] = decoder(value)
+    return event_data
+
+
+def trace_case_id(trace):
+    for elem in trace.findall(f"{NAMESPACE}string"):
+        if elem.attrib.get("key") == "concept:name":
+            return elem.attrib.get("value")
+    return None
+
+
+def compression(filename):
+    with open(filename, "rb") as source:
+        head = source.read(6)
+    for codec, magic, _ in CODECS:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+class LogStream:
+    # Binary reader over a plain or compressed (gzip/bz2/xz, detected from the
+    # magic bytes) log. Decompression is streamed straight into the parser;
+    # on close the codec and compressed/decompressed byte counts go into stats.
+
+    def __init__(self, filename, stats=None):
+        self.raw = open(filename, "rb")
+        self.codec = compression(filename)
+        self.stream = self.raw
+        for codec, _, opener in CODECS:
+            if codec == self.codec:
+                self.stream = opener(self.raw)
+        self.stats = stats
+        self.bytes_out = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_out += len(data)
+        return data
+
+    def close(self):
+        if self.stats is not None:
+            self.stats["codec"] = self.codec or "none"
+            self.stats["bytes_in"] = self.raw.tell()
+            self.stats["bytes_out"] = self.bytes_out
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+
+
+def iter_trace_elements(filename, stats=None):
+    # Incremental parse: every finished trace is handed out and then dropped
+    # from the tree, so memory is bounded by the largest trace. filename may
+    # also be an open binary file object.
+    source = filename if hasattr(filename, "read") else LogStream(filename, stats)
+    try:
+        context = ET.iterparse(source, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag != TRACE:
+                continue
+            case_id = trace_case_id(elem)
+            if case_id is not None:
+                yield case_id, elem
+            root.clear()
+    finally:
+        if source is not filename:
+            source.close()
+
+
+def iter_traces(filename, attributes=None, stats=None):
+    attributes = None if attributes is None else frozenset(attributes)
+    for case_id, trace in iter_trace_elements(filename, stats):
+        yield case_id, [decode_event(e, attributes) for e in trace.findall(EVENT)]
+
+
+def read_event_log(filename, attributes=None, stats=None):
+    # Fills the columnar EventLog trace by trace, so only one trace's event
+    # dictionaries exist at a time. Columns not listed in attributes stay
+    # empty (missing) for every event; other listed attributes go to the
+    # log's side store.
+    from event_log import EventLogBuilder
+
+    attributes = None if attributes is None else frozenset(attributes)
+    builder = EventLogBuilder()
+    for case_id, trace in iter_trace_elements(filename, stats):
+        builder.add_trace(case_id, [decode_event(e, attributes) for e in trace.findall(EVENT)])
+    return builder.build()
+
+
+def _trace_start(buffer, position, end):
+    # Next "<trace" start tag at or after position (not "<traces" etc.).
+    while True:
+        position = buffer.find(b"<trace", position, end)
+        if position < 0 or buffer[position + 6:position + 7] in (b">", b" ", b"\t", b"\n", b"\r", b"/"):
+            return position
+        position += 6
+
+
+def trace_ranges(filename, parts):
+    # Splits the file into the header (everything before the first trace) and
+    # up to `parts` byte ranges that each start on a <trace> tag and end where
+    # the next range starts, so every range holds only whole traces.
+    with open(filename, "rb") as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        body_start = _trace_start(buffer, 0, len(buffer))
+        if body_start < 0:
+            return body_start, []
+        body_end = buffer.rfind(b"</trace>") + len(b"</trace>")
+        bounds = [body_start]
+        for i in range(1, parts):
+            target = body_start + (body_end - body_start) * i // parts
+            boundary = _trace_start(buffer, max(target, bounds[-1] + 1), body_end)
+            if boundary < 0:
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+        bounds.append(body_end)
+    return body_start, list(zip(bounds, bounds[1:]))
+
+
+def _parse_range(filename, header_end, start, end, attributes=None):
+    with open(filename, "rb") as source:
+        header = source.read(header_end)
+        source.seek(start)
+        body = source.read(end - start)
+    root_tag = ROOT_TAG.search(header).group(1)
+    document = header + body + b"</" + root_tag + b">"
+    return list(iter_traces(io.BytesIO(document), attributes))
+
+
+def read_parallel(filename, workers=None, attributes=None):
+    # Traces are independent, so byte ranges aligned to <trace> tags are parsed
+    # in a process pool; pool.map keeps the range order, so the merged dict is
+    # identical to the serial reader. Assumes the literal "<trace" does not
+    # appear inside comments or CDATA in the trace section. Compressed logs
+    # cannot be split by byte offset and are read serially.
+    workers = workers or os.cpu_count() or 1
+    if compression(filename) is not None:
+        return dict(iter_traces(filename, attributes))
+    header_end, ranges = trace_ranges(filename, workers)
+    if len(ranges) <= 1:
+        return dict(iter_traces(filename, attributes))
+    log_dict = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        chunks = pool.map(_parse_range, [filename] * len(ranges), [header_end] * len(ranges),
+                          *zip(*ranges), [attributes] * len(ranges))
+        for traces in chunks:
+            log_dict.update(traces)
+    return log_dict
+
+
+def record_throughput(stats, events, started):
+    seconds = time.perf_counter() - started
+    stats["events"] = events
+    stats["seconds"] = seconds
+    stats["events_per_second"] = events / seconds if seconds > 0 else float("inf")
+    if "bytes_out" in stats:
+        stats["mb_per_second"] = stats["bytes_out"] / 1e6 / seconds if seconds > 0 else float("inf")
+    return stats
+
+
+def _measured(traces, stats):
+    started = time.perf_counter()
+    events = 0
+    try:
+        for case_id, trace_events in traces:
+            events += len(trace_events)
+            yield case_id, trace_events
+    finally:
+        record_throughput(stats, events, started)
+
+
+def read_from_file(filename, stream=False, columnar=False, cache=False, workers=None, stats=None,
+                   attributes=None):
+    # cache=True (or a snapshot path) implies columnar: the parsed EventLog is
+    # stored next to the source and memory-mapped on later calls. Passing a
+    # dict as stats fills it with events, seconds and events_per_second, plus
+    # codec, bytes_in, bytes_out and mb_per_second (decompressed) when the XML
+    # is parsed. .xes.gz/.bz2/.xz inputs are detected and streamed as is.
+    # attributes limits decoding to the listed event keys (e.g. ALPHA_ATTRIBUTES).
+    if stream:
+        traces = iter_traces(filename, attributes, stats)
+        return traces if stats is None else _measured(traces, stats)
+
+    started = time.perf_counter()
+    if cache:
+        from log_cache import load_or_build
+
+        log = load_or_build(filename, read_event_log, None if cache is True else cache, attributes)
+    elif columnar:
+        log = read_event_log(filename, attributes, stats)
+    elif workers is not None and workers > 1:
+        log = read_parallel(filename, workers, attributes)
+    else:
+        log = dict(iter_traces(filename, attributes, stats))
+
+    if stats is not None:
+        events = log.n_events if columnar or cache else sum(len(events) for events in log.values())
+        record_throughput(stats, events, started)
+    return log